@@ -1,11 +1,20 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import asyncio
+import os
+import threading
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlmodel import Session, select
-from database import get_session
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database import get_async_session
+from invalidation import bump_cache_version
 from models import User
 
 # Configuration
@@ -13,7 +22,13 @@ SECRET_KEY = "your-secret-key-change-this-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt is CPU-bound; keep it off the event loop and cap how much runs at once
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "2"))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "16"))
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 from pydantic import BaseModel
@@ -22,16 +37,40 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
+# passlib and jose (with cryptography) are imported on first login or token
+# check rather than at boot; public menu traffic never needs them
+@lru_cache(maxsize=None)
+def password_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_context().verify(plain_password, hashed_password)
 
 def authenticate_user(plain_password, hashed_password):
     return verify_password(plain_password, hashed_password)
 
+_bcrypt_executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_bcrypt_slots: Optional[asyncio.Semaphore] = None
+
+async def authenticate_user_async(plain_password, hashed_password):
+    """authenticate_user() run in the bcrypt pool.
+
+    At most BCRYPT_MAX_PENDING checks are queued or running; further logins
+    wait on the semaphore without blocking the event loop.
+    """
+    global _bcrypt_slots
+    if _bcrypt_slots is None:
+        _bcrypt_slots = asyncio.Semaphore(BCRYPT_MAX_PENDING)
+    async with _bcrypt_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_bcrypt_executor, authenticate_user, plain_password, hashed_password)
+
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return password_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    from jose import jwt
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -41,12 +80,92 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)):
+class PrincipalCache:
+    """Short-lived LRU of JWT -> User, so protected calls skip the user query.
+
+    Entries expire after PRINCIPAL_CACHE_TTL_SECONDS (or when the token
+    does, if sooner) and are dropped when their user row is written (see
+    _stamp_user_writes below).
+    """
+
+    def __init__(self, ttl: float = PRINCIPAL_CACHE_TTL_SECONDS, maxsize: int = PRINCIPAL_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= time.monotonic():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return user
+
+    def put(self, token: str, user: User, token_exp: Optional[float] = None):
+        lifetime = self.ttl
+        if token_exp is not None:
+            lifetime = min(lifetime, token_exp - time.time())
+        if lifetime <= 0:
+            return
+        # Cache a detached copy so no session state is shared across requests
+        principal = User(id=user.id, username=user.username, hashed_password=user.hashed_password)
+        with self._lock:
+            self._entries[token] = (time.monotonic() + lifetime, principal)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, username: str):
+        with self._lock:
+            for token in [t for t, (_, user) in self._entries.items() if user.username == username]:
+                del self._entries[token]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+principal_cache = PrincipalCache()
+
+# --- Keeping cached principals current ---
+# Any flush that writes a User (seed, password or account changes) bumps the
+# "users" cache version in its transaction, so other processes clear their
+# principals (invalidation bus); this process drops the users' entries on
+# commit.
+
+@event.listens_for(OrmSession, "before_flush")
+def _stamp_user_writes(session, flush_context, instances):
+    users = [obj for obj in session.new | session.deleted if isinstance(obj, User)] + [
+        obj for obj in session.dirty if isinstance(obj, User) and session.is_modified(obj)
+    ]
+    if users:
+        bump_cache_version(session.connection(), "users")
+        session.info.setdefault("changed_users", set()).update(user.username for user in users)
+
+@event.listens_for(OrmSession, "after_commit")
+def _drop_changed_principals(session):
+    for username in session.info.pop("changed_users", ()):
+        principal_cache.invalidate_user(username)
+
+@event.listens_for(OrmSession, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop("changed_users", None)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_async_session)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
+
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -55,7 +174,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme), session: Session
     except JWTError:
         raise credentials_exception
         
-    user = session.exec(select(User).where(User.username == username)).first()
+    user = (await session.exec(select(User).where(User.username == username))).first()
     if user is None:
         raise credentials_exception
+    principal_cache.put(token, user, payload.get("exp"))
     return user
@@ -0,0 +1,350 @@
+"""Benchmark: HTTP load test of the hot API paths, with JSON results.
+
+Starts `uvicorn main:app` against a synthetic catalog (bench_data, shaped
+like the seed.py menu), then drives each scenario with `--concurrency`
+concurrent clients for `--duration` seconds and reports throughput plus
+p50/p95/p99 latency.
+
+    python bench_api.py --items 5000 --concurrency 32 --output sqlite.json
+    python bench_api.py --database-url postgresql://localhost/bench --output pg.json
+    python bench_api.py --url http://localhost:8000              # an already running server
+    python bench_api.py --compare sqlite.json --output new.json  # exit 1 on a p95 regression
+
+Without --database-url (or DATABASE_URL) a throwaway SQLite file is used.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+SCENARIOS = ("menu", "menu_304", "menu_list", "track_visit", "token", "stats", "crud")
+BENCH_USER = ("admin", "admin123")
+# A scenario regresses when its p95 grows by more than this fraction
+REGRESSION_THRESHOLD = float(os.getenv("BENCH_REGRESSION_THRESHOLD", "0.2"))
+
+
+# --- Setup ---
+
+def prepare_database(database_url: str, n_items: int) -> int:
+    """Migrate and fill the database unless it already has a menu."""
+    os.environ["DATABASE_URL"] = database_url
+    from sqlmodel import Session, select, func
+
+    from bench_data import synthetic_menu
+    from database import engine
+    from menu_io import import_menu
+    from migrate import migrate
+    from models import MenuItem
+    from seed import seed_data
+
+    migrate()
+    with Session(engine) as session:
+        existing = session.exec(select(func.count()).select_from(MenuItem)).one()
+    if not existing:
+        import_menu(synthetic_menu(n_items))
+    # Admin user and a week of DailyStat rows; categories exist, so no menu seed
+    seed_data()
+    with Session(engine) as session:
+        return session.exec(select(func.count()).select_from(MenuItem)).one()
+
+
+def start_server(database_url: str, port: int, workers: int) -> subprocess.Popen:
+    env = {
+        **os.environ, "DATABASE_URL": database_url, "SEED": "false",
+        # Every simulated client shares one address and User-Agent; measure
+        # the endpoints, not the rate limiter and the daily visitor filter
+        "RATE_LIMIT_ENABLED": "false", "VISIT_DEDUPE_ENABLED": "false",
+    }
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning", "--no-access-log"]
+    return subprocess.Popen(command, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                            stdout=subprocess.DEVNULL)
+
+
+async def wait_ready(base_url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become ready in {timeout:.0f}s")
+
+
+# --- Scenarios ---
+# Each takes (client, context) and returns [(operation, status_code), ...]
+# for the requests it made; the runner times each call.
+
+async def scenario_menu(client, context):
+    return [("menu", (await client.get("/api/menu", headers={"Accept-Encoding": "gzip"})).status_code)]
+
+
+async def scenario_menu_304(client, context):
+    response = await client.get("/api/menu", headers={"If-None-Match": context["menu_etag"]})
+    return [("menu_304", response.status_code)]
+
+
+async def scenario_menu_list(client, context):
+    return [("menu_list", (await client.get("/api/menu?fields=list&available=true")).status_code)]
+
+
+async def scenario_track_visit(client, context):
+    return [("track_visit", (await client.post("/api/track-visit")).status_code)]
+
+
+async def scenario_token(client, context):
+    username, password = BENCH_USER
+    response = await client.post("/token", data={"username": username, "password": password})
+    return [("token", response.status_code)]
+
+
+async def scenario_stats(client, context):
+    response = await client.get("/api/stats?granularity=day", headers=context["auth"])
+    return [("stats", response.status_code)]
+
+
+async def scenario_crud(client, context):
+    """Create, update and delete one item: one sample per request."""
+    headers = context["auth"]
+    item = {
+        "name": f"Bench dish {random.getrandbits(48):x}", "price": 100000,
+        "ingredients_en": "Garlic,Tomato", "ingredients_fa": "سیر,گوجه",
+        "category_id": context["category_id"],
+    }
+    results = []
+    response = await client.post("/api/items", json=item, headers=headers)
+    results.append(("crud_create", response.status_code))
+    if response.status_code != 200:
+        return results
+    item_id = response.json()["id"]
+    response = await client.put(f"/api/items/{item_id}", json={"price": 120000}, headers=headers)
+    results.append(("crud_update", response.status_code))
+    response = await client.delete(f"/api/items/{item_id}", headers=headers)
+    results.append(("crud_delete", response.status_code))
+    return results
+
+
+class TimedClient:
+    """Wraps httpx.AsyncClient to record the latency of every request."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.latencies = []
+
+    async def request(self, method, url, **kwargs):
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.latencies.append(time.perf_counter() - started)
+        return response
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url, **kwargs):
+        return await self.request("PUT", url, **kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await self.request("DELETE", url, **kwargs)
+
+
+async def run_scenario(client, name: str, context, concurrency: int, duration: float, warmup: float):
+    scenario = globals()[f"scenario_{name}"]
+    samples = {}  # operation -> ([latency seconds], errors)
+    recording = False
+    deadline = time.monotonic() + warmup + duration
+
+    async def worker():
+        timed = TimedClient(client)
+        while time.monotonic() < deadline:
+            timed.latencies.clear()
+            try:
+                results = await scenario(timed, context)
+            except httpx.HTTPError:
+                results = [(name, None)]
+            if not recording:
+                continue
+            for (operation, status_code), latency in zip(results, timed.latencies + [None] * len(results)):
+                latencies, errors = samples.setdefault(operation, ([], [0]))
+                if status_code is None or status_code >= 400:
+                    errors[0] += 1
+                elif latency is not None:
+                    latencies.append(latency)
+
+    tasks = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    await asyncio.sleep(warmup)
+    recording = True
+    started = time.monotonic()
+    await asyncio.gather(*tasks)
+    elapsed = time.monotonic() - started
+    return {operation: summarize(latencies, errors[0], elapsed) for operation, (latencies, errors) in samples.items()}
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "max_ms": ms(latencies[-1]) if latencies else 0.0,
+    }
+
+
+async def build_context(client: httpx.AsyncClient) -> dict:
+    username, password = BENCH_USER
+    token = (await client.post("/token", data={"username": username, "password": password})).json()["access_token"]
+    menu = await client.get("/api/menu?fields=id")
+    categories = menu.json()
+    if not categories:
+        raise RuntimeError("The benchmark database has no categories")
+    return {
+        "auth": {"Authorization": f"Bearer {token}"},
+        "menu_etag": (await client.get("/api/menu")).headers.get("etag", ""),
+        "category_id": categories[0]["id"],
+    }
+
+
+async def run(base_url: str, scenarios, concurrency: int, duration: float, warmup: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        context = await build_context(client)
+        results = {}
+        for name in scenarios:
+            print(f"running {name} ...", file=sys.stderr)
+            results.update(await run_scenario(client, name, context, concurrency, duration, warmup))
+        return results
+
+
+# --- Reporting ---
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def print_table(results: dict, baseline: dict = None):
+    header = f"{'operation':<14}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>8}"
+    print(header + ("  p95 vs baseline" if baseline else ""), file=sys.stderr)
+    for operation, result in results.items():
+        line = (f"{operation:<14}{result['throughput_rps']:>10.1f}{result['p50_ms']:>8.2f}ms"
+                f"{result['p95_ms']:>8.2f}ms{result['p99_ms']:>8.2f}ms{result['errors']:>8}")
+        if baseline and operation in baseline and baseline[operation]["p95_ms"]:
+            change = result["p95_ms"] / baseline[operation]["p95_ms"] - 1
+            line += f"  {change:+.0%}"
+        print(line, file=sys.stderr)
+
+
+def regressions(results: dict, baseline: dict) -> list:
+    found = []
+    for operation, result in results.items():
+        before = baseline.get(operation)
+        if before and before["p95_ms"] and result["p95_ms"] > before["p95_ms"] * (1 + REGRESSION_THRESHOLD):
+            found.append(f"{operation}: p95 {before['p95_ms']:.2f} ms -> {result['p95_ms']:.2f} ms")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--url", help="benchmark a running server instead of starting one")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=1.0, help="unrecorded seconds before each scenario")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON report; exit 1 if a p95 regresses")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+
+    server = None
+    items = None
+    database_url = args.database_url
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        if not database_url:
+            database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_api.db')}"
+        items = prepare_database(database_url, args.items)
+        base_url = f"http://127.0.0.1:{args.port}"
+        server = start_server(database_url, args.port, args.workers)
+
+    try:
+        asyncio.run(wait_ready(base_url))
+        results = asyncio.run(run(base_url, scenarios, args.concurrency, args.duration, args.warmup))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "database": (database_url or "").split(":", 1)[0] if not args.url else "remote",
+            "items": items,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "workers": args.workers if not args.url else None,
+        },
+        "results": results,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print_table(results, baseline)
+
+    body = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(body + "\n")
+    else:
+        print(body)
+
+    if baseline:
+        found = regressions(results, baseline)
+        for regression in found:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Synthetic menus for the benchmarks, shaped like the seed.py data."""
+import random
+from typing import List
+
+from models import MenuImport
+
+CATEGORY_TEMPLATES = [
+    ("Signature Steaks", "استیک‌های ویژه", "signature-steaks"),
+    ("Local Favorites", "غذاهای محلی", "local-favorites"),
+    ("Seafood", "دریایی", "seafood"),
+]
+
+ITEM_TEMPLATES = [
+    {
+        "name": "Ribeye Steak", "name_fa": "استیک ریب‌آی",
+        "description": "Wet aged beef with roasted vegetables and truffle sauce",
+        "description_fa": "گوساله بیات شده با سبزیجات کبابی و سس ترافل مخصوص.",
+        "ingredients_en": "Ribeye Cut,Asparagus", "ingredients_fa": "راسته گوساله,مارچوبه",
+        "image_url": "https://images.unsplash.com/photo-1600891964092-4316c288032e?q=80&w=800&auto=format&fit=crop",
+    },
+    {
+        "name": "Mirza Ghasemi", "name_fa": "میرزا قاسمی",
+        "description": "Smoked eggplant, garlic, eggs",
+        "description_fa": "بادمجان دودی، سیر، تخم مرغ",
+        "ingredients_en": "Eggplant,Garlic", "ingredients_fa": "بادمجان,سیر",
+        "image_url": "https://images.unsplash.com/photo-1618449840665-9ed506d73a34?q=80&w=800&auto=format&fit=crop",
+    },
+    {
+        "name": "Kebab Torsh", "name_fa": "کباب ترش",
+        "description": "Beef marinated in pomegranate paste & walnuts",
+        "description_fa": "گوساله مزه‌دار شده با رب انار و گردو",
+        "ingredients_en": "Beef Fillet,Walnuts", "ingredients_fa": "فیله گوساله,گردو",
+        "image_url": "https://images.unsplash.com/photo-1555939594-58d7cb561ad1?q=80&w=800&auto=format&fit=crop",
+    },
+    {
+        "name": "Seafood Platter", "name_fa": "سینی دریایی",
+        "description": "Lobster, shrimp, calamari, mussels",
+        "description_fa": "لابستر، میگو، کالاماری، صدف",
+        "ingredients_en": "Lobster,Shrimp,Mussels", "ingredients_fa": "لابستر,میگو,صدف",
+        "image_url": "https://images.unsplash.com/photo-1565680018434-b513d5e5fd47?q=80&w=800&auto=format&fit=crop",
+    },
+]
+
+
+def synthetic_menu(n_items: int, n_categories: int = 20, seed: int = 96) -> MenuImport:
+    """A MenuImport with `n_items` items spread over `n_categories` categories."""
+    rng = random.Random(seed)
+    categories: List[dict] = []
+    for c in range(n_categories):
+        name, name_fa, slug = CATEGORY_TEMPLATES[c % len(CATEGORY_TEMPLATES)]
+        categories.append({"name": f"{name} {c}", "name_fa": f"{name_fa} {c}", "slug": f"{slug}-{c}", "items": []})
+    for i in range(n_items):
+        template = ITEM_TEMPLATES[i % len(ITEM_TEMPLATES)]
+        categories[i % n_categories]["items"].append({
+            **template,
+            "name": f"{template['name']} #{i}",
+            "name_fa": f"{template['name_fa']} #{i}",
+            "price": rng.randrange(300_000, 3_000_000, 10_000),
+            "rating": round(rng.uniform(3.5, 5.0), 1),
+            "calories": rng.randrange(200, 1300),
+            "time": f"{rng.randrange(10, 40)}-{rng.randrange(40, 50)}",
+            "is_available": rng.random() > 0.1,
+        })
+    return MenuImport.model_validate({"categories": categories})
@@ -0,0 +1,95 @@
+"""Benchmark: loading a menu with one POST /api/items per item vs. one
+POST /api/menu/bulk, plus streaming it back out of /api/menu/export.
+
+Runs the app in-process against a throwaway SQLite file unless DATABASE_URL
+is set.
+
+    python bench_import.py --items 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+if not os.getenv("DATABASE_URL"):
+    _tmp_dir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench_import.db')}"
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select, delete, func
+
+from auth import get_password_hash
+from bench_data import synthetic_menu
+from database import engine
+from migrate import migrate
+from models import Category, MenuItem, User
+import main
+
+
+def login(client):
+    with Session(engine) as session:
+        if not session.exec(select(User).where(User.username == "bench")).first():
+            session.add(User(username="bench", hashed_password=get_password_hash("bench")))
+            session.commit()
+    token = client.post("/token", data={"username": "bench", "password": "bench"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def clear_menu():
+    with Session(engine) as session:
+        session.exec(delete(MenuItem))
+        session.exec(delete(Category))
+        session.commit()
+
+
+def count_items():
+    with Session(engine) as session:
+        return session.exec(select(func.count()).select_from(MenuItem)).one()
+
+
+def import_per_item(client, headers, menu):
+    for category in menu.categories:
+        payload = category.model_dump(exclude={"items"})
+        category_id = client.post("/api/categories", json=payload, headers=headers).json()["id"]
+        for item in category.items:
+            client.post("/api/items", json={**item.model_dump(), "category_id": category_id}, headers=headers)
+
+
+def import_bulk(client, headers, menu):
+    response = client.post("/api/menu/bulk", content=menu.model_dump_json(),
+                           headers={**headers, "Content-Type": "application/json"})
+    response.raise_for_status()
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--categories", type=int, default=20)
+    args = parser.parse_args()
+
+    migrate()
+    menu = synthetic_menu(args.items, args.categories)
+    print(f"{args.items} items in {args.categories} categories on {engine.dialect.name}")
+
+    with TestClient(main.app) as client:
+        headers = login(client)
+
+        for name, run in (("per-item POST", import_per_item), ("bulk import", import_bulk)):
+            clear_menu()
+            started = time.perf_counter()
+            run(client, headers, menu)
+            elapsed = time.perf_counter() - started
+            print(f"{name:<14} {elapsed:8.2f}s  {args.items / elapsed:>10,.0f} items/s  stored={count_items()}")
+
+        for fmt in ("csv", "json"):
+            started = time.perf_counter()
+            size = 0
+            with client.stream("GET", f"/api/menu/export?format={fmt}", headers=headers) as response:
+                for chunk in response.iter_bytes():
+                    size += len(chunk)
+            elapsed = time.perf_counter() - started
+            print(f"export {fmt:<7} {elapsed:8.2f}s  {size / 1024:>10,.0f} KiB")
+
+
+if __name__ == "__main__":
+    main_()
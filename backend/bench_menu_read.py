@@ -0,0 +1,116 @@
+"""Benchmark: building the /api/menu body on a cache miss.
+
+Compares the previous ORM path (joinedload of Category/MenuItem instances,
+validated into CategoryRead and dumped by pydantic) with the Core path in
+menu_query.query_menu (column SELECTs, row tuples grouped into dicts,
+dumped by orjson). Reports the best latency and the peak Python memory
+(tracemalloc) of each.
+
+Runs against a throwaway SQLite file unless DATABASE_URL is set (the
+menu tables are cleared and refilled).
+
+    python bench_menu_read.py --sizes 1000 10000 100000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+# The ORM path's big joined SELECT would otherwise be logged on every run
+os.environ.setdefault("SLOW_QUERY_MS", "0")
+if not os.getenv("DATABASE_URL"):
+    _tmp_dir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench_menu_read.db')}"
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy.orm import joinedload
+from sqlmodel import Session, select, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from bench_data import synthetic_menu
+from database import engine, async_engine
+from menu_io import import_menu
+from menu_query import query_menu
+from migrate import migrate
+from models import Category, CategoryRead, MenuItem, MenuItemIngredient
+
+menu_adapter = TypeAdapter(List[CategoryRead])
+
+
+async def orm_payload() -> bytes:
+    async with AsyncSession(async_engine) as session:
+        statement = select(Category).options(joinedload(Category.items))
+        results = (await session.exec(statement)).unique().all()
+        menu = menu_adapter.validate_python(results, from_attributes=True)
+    return menu_adapter.dump_json(menu)
+
+
+async def core_payload() -> bytes:
+    async with AsyncSession(async_engine) as session:
+        return orjson.dumps(await query_menu(session))
+
+
+def load(n_items: int):
+    with Session(engine) as session:
+        session.exec(delete(MenuItemIngredient))
+        session.exec(delete(MenuItem))
+        session.exec(delete(Category))
+        session.commit()
+    import_menu(synthetic_menu(n_items))
+
+
+async def timed(build, repeat: int):
+    best = float("inf")
+    body = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = await build()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, body
+
+
+async def peak_memory(build) -> int:
+    tracemalloc.start()
+    try:
+        await build()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+async def run(sizes: List[int], repeat: int):
+    paths = {"orm (joinedload)": orm_payload, "core (row tuples)": core_payload}
+    for n_items in sizes:
+        load(n_items)
+        print(f"--- {n_items} items ---")
+        bodies = {}
+        for name, build in paths.items():
+            await build()  # warm the statement cache and the connection pool
+            ms, bodies[name] = await timed(build, repeat)
+            peak = await peak_memory(build)
+            print(f"  {name:<18} {ms:10.1f} ms   peak {peak / 1024 / 1024:8.1f} MiB   {len(bodies[name]) / 1024:10,.0f} KiB")
+        orm_menu, core_menu = (orjson.loads(body) for body in bodies.values())
+        # The ORM path has no ORDER BY, so compare item order-insensitively
+        for menu in (orm_menu, core_menu):
+            for category in menu:
+                category["items"].sort(key=lambda item: item["id"])
+        print(f"  same document: {orm_menu == core_menu}")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    migrate()
+    print(f"Database: {engine.dialect.name}")
+    asyncio.run(run(args.sizes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
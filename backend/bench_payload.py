@@ -0,0 +1,73 @@
+"""Benchmark: /api/menu serialization time and bytes on the wire.
+
+Compares FastAPI's default jsonable_encoder path, pydantic's dump_json (used
+for the menu snapshot) and orjson, then the gzip/brotli sizes of the result.
+
+    python bench_payload.py --sizes 100 1000 10000
+"""
+import argparse
+import json
+import time
+from typing import List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from bench_data import synthetic_menu
+from models import CategoryRead
+from responses import compress, brotli
+
+menu_adapter = TypeAdapter(List[CategoryRead])
+
+
+def menu_models(n_items):
+    menu = synthetic_menu(n_items)
+    item_id = 0
+    categories = []
+    for category_id, category in enumerate(menu.categories, start=1):
+        items = []
+        for item in category.items:
+            item_id += 1
+            items.append({**item.model_dump(), "id": item_id, "category_id": category_id})
+        categories.append({**category.model_dump(exclude={"items"}), "id": category_id, "items": items})
+    return menu_adapter.validate_python(categories)
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    encoders = {
+        "jsonable_encoder": lambda m: json.dumps(jsonable_encoder(m), ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        "pydantic": lambda m: menu_adapter.dump_json(m),
+        "orjson": lambda m: orjson.dumps(menu_adapter.dump_python(m)),
+    }
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+
+    for n_items in args.sizes:
+        models = menu_models(n_items)
+        print(f"--- {n_items} items ---")
+        body = None
+        for name, encode in encoders.items():
+            ms, body = timed(lambda: encode(models), args.repeat)
+            print(f"  serialize {name:<17} {ms:9.2f} ms   {len(body) / 1024:10,.1f} KiB")
+        for encoding in encodings:
+            ms, compressed = timed(lambda: compress(body, encoding), args.repeat)
+            ratio = len(compressed) / len(body)
+            print(f"  compress  {encoding:<17} {ms:9.2f} ms   {len(compressed) / 1024:10,.1f} KiB  ({ratio:.0%})")
+
+
+if __name__ == "__main__":
+    main()
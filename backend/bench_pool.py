@@ -0,0 +1,102 @@
+"""Load test: the old create_engine(echo=True) setup vs. build_engine().
+
+Each client thread runs the /api/menu query on its own session, the way
+FastAPI's threadpool does. Uses a throwaway seeded SQLite file unless
+DATABASE_URL is set.
+
+    python bench_pool.py --clients 32 --requests 50
+"""
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+if not os.getenv("DATABASE_URL"):
+    _tmp_dir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench_pool.db')}"
+
+from sqlmodel import Session, select, create_engine
+from sqlalchemy.orm import joinedload
+from database import build_engine, resolve_database_url
+from migrate import migrate
+from models import Category
+
+
+def menu_query(engine):
+    with Session(engine) as session:
+        session.exec(select(Category).options(joinedload(Category.items))).unique().all()
+
+
+def run(engine, clients, requests):
+    latencies = []
+    lock = threading.Lock()
+    gate = threading.Barrier(clients)
+
+    def worker():
+        gate.wait()
+        local = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            menu_query(engine)
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return elapsed, sorted(latencies)
+
+
+def percentile(values, pct):
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def report(name, elapsed, latencies):
+    print(f"{name:<14} {len(latencies) / elapsed:>9,.0f} req/s   "
+          f"p50={percentile(latencies, 50) * 1000:7.2f}ms   "
+          f"p99={percentile(latencies, 99) * 1000:7.2f}ms   "
+          f"mean={statistics.mean(latencies) * 1000:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50, help="requests per client")
+    args = parser.parse_args()
+
+    # A short GIL switch interval keeps CPU-bound client threads from
+    # convoying, so the tail reflects the engine rather than the scheduler
+    sys.setswitchinterval(0.0005)
+
+    migrate()
+    from seed import seed_data
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        seed_data()
+
+    url = resolve_database_url()
+    print(f"{args.clients} clients x {args.requests} requests on {url.split(':')[0]}")
+
+    # SQL echo writes to stdout; send it to /dev/null but still pay for it
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        before = create_engine(url, echo=True, connect_args={"check_same_thread": False} if url.startswith("sqlite") else {})
+        menu_query(before)
+    report("before", *run(before, args.clients, args.requests))
+    before.dispose()
+
+    after = build_engine(url)
+    menu_query(after)
+    report("build_engine", *run(after, args.clients, args.requests))
+    after.dispose()
+
+
+if __name__ == "__main__":
+    main()
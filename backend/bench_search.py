@@ -0,0 +1,79 @@
+"""Benchmark: /api/menu/search index build and query latency.
+
+Builds the in-memory index over a synthetic catalog and compares query
+latency with a linear scan of every item (what a client-side filter over
+the full /api/menu does).
+
+    python bench_search.py --items 50000
+"""
+import argparse
+import statistics
+import time
+
+from bench_data import synthetic_menu
+from search import SearchIndex, FIELD_WEIGHTS, normalize, query_tokens
+
+QUERIES = [
+    "ribeye", "keb", "salmon lemon", "walnut", "seafood platter 12",
+    "استیک", "كباب",  # Arabic kaf, should match Persian "کباب"
+    "بادمجان سیر", "گردو", "سینی دریایی",
+]
+
+
+def catalog(n_items):
+    items = []
+    for category_id, category in enumerate(synthetic_menu(n_items).categories, start=1):
+        for item in category.items:
+            items.append({**item.model_dump(), "id": len(items) + 1, "category_id": category_id})
+    return items
+
+
+def linear_scan(items, query):
+    tokens = query_tokens(query)
+    hits = []
+    for item in items:
+        text = normalize(" ".join(item[field] or "" for field in FIELD_WEIGHTS))
+        if all(token in text for token in tokens):
+            hits.append(item)
+    return hits
+
+
+def measure(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    items = catalog(args.items)
+    index = SearchIndex()
+    started = time.perf_counter()
+    index.rebuild(items)
+    print(f"indexed {len(index)} items in {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    for item_id in range(1, 1001):
+        index.upsert({**items[item_id - 1], "name": f"Updated dish {item_id}"})
+    print(f"1000 incremental upserts in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    print(f"{'query':<22}{'hits':>7}{'index p50':>12}{'index p99':>12}{'scan p50':>12}")
+    for query in QUERIES:
+        index_samples, results = measure(lambda: index.search(query, limit=20), args.repeat)
+        scan_samples, _ = measure(lambda: linear_scan(items, query), max(1, args.repeat // 10))
+        total_hits = len(index.search(query, limit=len(items)))
+        print(f"{query:<22}{total_hits:>7}{statistics.median(index_samples):>10.3f}ms"
+              f"{index_samples[int(len(index_samples) * 0.99) - 1]:>10.3f}ms"
+              f"{statistics.median(scan_samples):>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Benchmark: cold start, measured the way a replica scaled from zero sees it.
+
+Every run is a fresh interpreter:
+  * `python -X importtime -c "import main"`: total import time, the slowest
+    modules main imports, and any LAZY_MODULES that were loaded eagerly
+  * import + startup handlers + the first two GET /api/menu, with the
+    warm-up on and off
+
+Exits 1 if `import main` is over the budget or a lazy module was imported,
+so it can run as a check in CI or before a deploy.
+
+    python bench_startup.py --items 2000 --runs 5 --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+if not os.getenv("DATABASE_URL"):
+    _tmp_dir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench_startup.db')}"
+
+# Checked against the median of --runs imports. `import main` measures
+# 650-800 ms (over 1 s on a busy machine), so the budget leaves room for
+# noise; an eager heavy import is caught by LAZY_MODULES either way
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1500"))
+# Only needed by logins, the review sync or seeding; must not load at boot
+LAZY_MODULES = ("httpx", "jose", "passlib", "bcrypt", "cryptography", "PIL", "seed")
+
+BOOT_SCRIPT = r"""
+import asyncio, json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def get(path):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    messages = []
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        messages.append(message)
+    await main.app(scope, receive, send)
+    return messages[0]["status"]
+
+async def run():
+    for handler in main.app.router.on_startup:
+        result = handler()
+        if asyncio.iscoroutine(result):
+            await result
+    ready = time.perf_counter()
+    assert await get("/api/menu") == 200
+    first = time.perf_counter()
+    await get("/api/menu")
+    second = time.perf_counter()
+    for handler in main.app.router.on_shutdown:
+        result = handler()
+        if asyncio.iscoroutine(result):
+            await result
+    print(json.dumps({
+        "import_ms": (imported - started) * 1000,
+        "ready_ms": (ready - started) * 1000,
+        "first_menu_ms": (first - ready) * 1000,
+        "second_menu_ms": (second - first) * 1000,
+    }))
+
+asyncio.run(run())
+"""
+
+
+def parse_importtime(stderr: str, top_level: str = "main"):
+    """(cumulative_ms, direct imports, all imported names) of one top-level import.
+
+    `-X importtime` prints each module after everything it imported, so the
+    lines since the previous top-level module belong to `top_level`.
+    """
+    subtree = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if depth > 0:
+            subtree.append((name, depth, int(cumulative_us) / 1000))
+        elif name == top_level:
+            direct = [(child, ms) for child, child_depth, ms in subtree if child_depth == 1]
+            return int(cumulative_us) / 1000, direct, [child for child, _, _ in subtree]
+        else:
+            subtree = []
+    raise ValueError(f"{top_level} not found in -X importtime output")
+
+
+def measure_imports(runs: int):
+    totals = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                                capture_output=True, text=True, check=True)
+        total, direct, imported = parse_importtime(result.stderr)
+        totals.append(total)
+    return statistics.median(totals), direct, imported
+
+
+def measure_boot(runs: int, warmup: bool):
+    env = {**os.environ, "WARMUP_ON_STARTUP": "true" if warmup else "false"}
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-c", BOOT_SCRIPT], capture_output=True, text=True, check=True, env=env)
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+
+
+def prepare_database(n_items: int):
+    from migrate import migrate
+    from menu_io import import_menu
+    from bench_data import synthetic_menu
+    from database import engine
+    from sqlmodel import Session, select, func
+    from models import MenuItem
+
+    migrate()
+    with Session(engine) as session:
+        existing = session.exec(select(func.count()).select_from(MenuItem)).one()
+    if not existing:
+        import_menu(synthetic_menu(n_items))
+        existing = n_items
+    return existing
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"menu items: {prepare_database(args.items)}")
+
+    import_ms, direct, imported = measure_imports(args.runs)
+    print(f"\nimport main: {import_ms:.0f} ms (median of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    for name, ms in sorted(direct, key=lambda pair: pair[1], reverse=True)[:args.top]:
+        print(f"  {name:<28}{ms:>8.1f} ms")
+    eager = sorted({name.split(".")[0] for name in imported if name.split(".")[0] in LAZY_MODULES})
+
+    print(f"\n{'warm-up':<10}{'import':>10}{'ready':>10}{'1st menu':>11}{'2nd menu':>11}")
+    for warmup in (True, False):
+        boot = measure_boot(args.runs, warmup)
+        print(f"{'on' if warmup else 'off':<10}{boot['import_ms']:>8.0f}ms{boot['ready_ms']:>8.0f}ms"
+              f"{boot['first_menu_ms']:>9.1f}ms{boot['second_menu_ms']:>9.1f}ms")
+
+    failures = []
+    if import_ms > args.budget_ms:
+        failures.append(f"import main took {import_ms:.0f} ms, budget is {args.budget_ms:.0f} ms")
+    if eager:
+        failures.append(f"imported at boot but should be lazy: {', '.join(eager)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark: per-request DailyStat update vs. the write-behind VisitCounter.
+
+Runs against a throwaway SQLite file unless DATABASE_URL is set.
+
+    python bench_visits.py --clients 64 --visits 200
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+
+if not os.getenv("DATABASE_URL"):
+    _tmp_dir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench_visits.db')}"
+
+from sqlmodel import Session, delete
+from database import engine
+from migrate import migrate
+from models import DailyStat
+from visits import VisitCounter, VisitFlusher
+
+
+def reset():
+    with Session(engine) as session:
+        session.exec(delete(DailyStat))
+        session.commit()
+
+
+def stored_visits(day):
+    with Session(engine) as session:
+        stat = session.get(DailyStat, day)
+        return stat.total_visits if stat else 0
+
+
+def run_clients(clients, visits, fn):
+    errors = []
+    start_gate = threading.Barrier(clients)
+
+    def worker():
+        start_gate.wait()
+        for _ in range(visits):
+            try:
+                fn()
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started, len(errors)
+
+
+def legacy_track_visit(day):
+    # The old /api/track-visit body: read, increment in Python, commit
+    with Session(engine) as session:
+        stat = session.get(DailyStat, day)
+        if not stat:
+            stat = DailyStat(date=day, total_visits=1)
+        else:
+            stat.total_visits += 1
+        session.add(stat)
+        session.commit()
+
+
+def report(name, expected, elapsed, errors, stored):
+    print(f"{name:<14} {expected / elapsed:>12,.0f} visits/s   "
+          f"stored={stored:<8} lost={expected - stored:<8} errors={errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--visits", type=int, default=100, help="visits per client")
+    parser.add_argument("--flush-interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    migrate()
+    day = date.today()
+    expected = args.clients * args.visits
+    print(f"{args.clients} clients x {args.visits} visits on {engine.dialect.name}")
+
+    reset()
+    elapsed, errors = run_clients(args.clients, args.visits, lambda: legacy_track_visit(day))
+    report("row update", expected, elapsed, errors, stored_visits(day))
+
+    reset()
+    counter = VisitCounter()
+    flusher = VisitFlusher(counter, interval=args.flush_interval)
+    flusher.start()
+    elapsed, errors = run_clients(args.clients, args.visits, lambda: counter.add(day))
+    flusher.stop()
+    report("write-behind", expected, elapsed, errors, stored_visits(day))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import asyncio
+import hashlib
+import threading
+from typing import Awaitable, Callable, Dict, Optional
+
+from responses import compress
+
+
+class MenuSnapshot:
+    """One serialized menu with its ETag and lazily compressed variants."""
+
+    __slots__ = ("body", "etag", "_encoded")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = make_etag(body)
+        self._encoded: Dict[str, bytes] = {}
+
+    def cached_encoding(self, encoding: str) -> Optional[bytes]:
+        return self._encoded.get(encoding)
+
+    def encoded(self, encoding: str) -> bytes:
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = compress(self.body, encoding)
+        return data
+
+
+class MenuCache:
+    """Pre-serialized /api/menu snapshot plus its ETag and compressed forms.
+
+    The snapshot is built lazily on the first read after an invalidation and
+    served as raw bytes until the next write endpoint calls `invalidate()`.
+    """
+
+    def __init__(self):
+        self._build_lock = threading.Lock()
+        self._async_build_lock: Optional[asyncio.Lock] = None
+        self._state_lock = threading.Lock()
+        self._generation = 0
+        self._snapshot: Optional[MenuSnapshot] = None
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, build: Callable[[], bytes]) -> MenuSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        # Only one request rebuilds; the others wait and reuse its result
+        with self._build_lock:
+            snapshot = self._snapshot
+            if snapshot is not None:
+                return snapshot
+
+            generation = self._generation
+            body = build()
+            snapshot = MenuSnapshot(body)
+            # Don't publish a snapshot if a write landed while we were building
+            with self._state_lock:
+                if generation == self._generation:
+                    self._snapshot = snapshot
+            return snapshot
+
+    async def aget(self, build: Callable[[], Awaitable[bytes]]) -> MenuSnapshot:
+        """Same as `get()` for request handlers that build on the event loop."""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        if self._async_build_lock is None:
+            self._async_build_lock = asyncio.Lock()
+        async with self._async_build_lock:
+            snapshot = self._snapshot
+            if snapshot is not None:
+                return snapshot
+
+            generation = self._generation
+            body = await build()
+            snapshot = MenuSnapshot(body)
+            with self._state_lock:
+                if generation == self._generation:
+                    self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self):
+        with self._state_lock:
+            self._generation += 1
+            self._snapshot = None
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+menu_cache = MenuCache()
@@ -1,25 +1,135 @@
 from sqlmodel import create_engine, SQLModel, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 import os
 
-# Production (PostgreSQL) vs Development (SQLite)
-database_url = os.getenv("DATABASE_URL")
+from metrics import instrument_engine
 
-if database_url:
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+def resolve_database_url():
+    # Production (PostgreSQL) vs Development (SQLite)
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        sqlite_file_name = "restaurant_database_v3.db"
+        return f"sqlite:///{sqlite_file_name}"
     # Railway provides 'postgres://', but SQLAlchemy needs 'postgresql://'
     if database_url.startswith("postgres://"):
         database_url = database_url.replace("postgres://", "postgresql://", 1)
-    connect_args = {}
-else:
-    sqlite_file_name = "restaurant_database_v3.db"
-    database_url = f"sqlite:///{sqlite_file_name}"
-    connect_args = {"check_same_thread": False}
+    return database_url
+
+def engine_options(database_url):
+    """create_engine() keyword arguments for the given URL, tuned from env vars.
+
+    DB_ECHO              log every SQL statement (default off)
+    DB_POOL_SIZE         persistent connections per process (default 5)
+    DB_MAX_OVERFLOW      extra connections allowed under burst (default 10)
+    DB_POOL_TIMEOUT      seconds to wait for a free connection (default 30)
+    DB_POOL_RECYCLE      seconds before a connection is replaced (default 1800)
+    DB_POOL_PRE_PING     test connections on checkout (default on for Postgres)
+    DB_STATEMENT_TIMEOUT_MS  per-statement limit, Postgres only (default 15000)
+    SQLITE_BUSY_TIMEOUT_MS   how long SQLite waits on a locked DB (default 5000)
+    """
+    url = make_url(database_url)
+    options = {"echo": _env_bool("DB_ECHO", False)}
+
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        if url.database in (None, "", ":memory:"):
+            # An in-memory DB only exists inside its one connection
+            options["poolclass"] = StaticPool
+        else:
+            options["poolclass"] = QueuePool
+            options["pool_size"] = int(os.getenv("DB_POOL_SIZE", "5"))
+            options["max_overflow"] = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+            options["pool_timeout"] = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+            options["pool_pre_ping"] = _env_bool("DB_POOL_PRE_PING", False)
+        return options
+
+    options["pool_size"] = int(os.getenv("DB_POOL_SIZE", "5"))
+    options["max_overflow"] = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    options["pool_timeout"] = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    options["pool_recycle"] = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    options["pool_pre_ping"] = _env_bool("DB_POOL_PRE_PING", True)
+    if url.get_backend_name() == "postgresql":
+        statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+        if statement_timeout > 0:
+            options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+    return options
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    busy_timeout = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={busy_timeout}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+def build_engine(database_url=None, **overrides):
+    database_url = database_url or resolve_database_url()
+    options = engine_options(database_url)
+    options.update(overrides)
+    new_engine = create_engine(database_url, **options)
+    instrument_engine(new_engine)
+    if new_engine.dialect.name == "sqlite":
+        event.listen(new_engine, "connect", _set_sqlite_pragmas)
+        if new_engine.url.database not in (None, "", ":memory:"):
+            # WAL lets readers proceed during a write; it is stored in the
+            # DB file, so it only needs setting once
+            with new_engine.connect() as conn:
+                conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+    return new_engine
 
-# echo=True only for dev/sqlite usually, but keeping it simple
-engine = create_engine(database_url, echo=True, connect_args=connect_args)
+engine = build_engine()
+
+# --- Async path (asyncpg on Postgres, aiosqlite in dev) ---
+# Used by the hot public endpoints; seed.py and the debug scripts stay sync.
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+def async_database_url(database_url):
+    url = make_url(database_url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()]).render_as_string(hide_password=False)
+
+def build_async_engine(database_url=None, **overrides):
+    database_url = database_url or resolve_database_url()
+    options = engine_options(database_url)
+    if options.get("poolclass") is QueuePool:
+        options["poolclass"] = AsyncAdaptedQueuePool
+    if make_url(database_url).get_backend_name() == "postgresql":
+        # asyncpg takes server settings instead of libpq's "-c" options
+        options.pop("connect_args", None)
+        statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+        if statement_timeout > 0:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(statement_timeout)}}
+    options.update(overrides)
+    new_engine = create_async_engine(async_database_url(database_url), **options)
+    instrument_engine(new_engine.sync_engine)
+    if new_engine.dialect.name == "sqlite":
+        event.listen(new_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return new_engine
+
+async_engine = build_async_engine()
+
+def dialect_insert(table):
+    """INSERT construct with ON CONFLICT support for the active dialect."""
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
 
 def get_session():
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def get_async_session():
+    async with AsyncSession(async_engine) as session:
+        yield session
@@ -1,12 +1,8 @@
-from sqlmodel import Session, select, create_engine
+from sqlmodel import Session, select
+from database import engine
 from models import Category, MenuItem, CategoryRead
 from sqlalchemy.orm import joinedload
 
-# Use the new database file
-sqlite_file_name = "restaurant_database_v2.db"
-sqlite_url = f"sqlite:///{sqlite_file_name}"
-engine = create_engine(sqlite_url)
-
 def test_query():
     with Session(engine) as session:
         print("--- Testing Database Query ---")
@@ -20,7 +16,7 @@ def test_query():
         from fastapi.encoders import jsonable_encoder
         try:
             # Manually convert to Read models first to mimic FastAPI response_model
-            read_models = [CategoryRead.from_orm(c) for c in results]
+            read_models = [CategoryRead.model_validate(c, from_attributes=True) for c in results]
             json_data = jsonable_encoder(read_models)
             print("Serialization Successful!")
             print(f"First item name_fa: {json_data[0]['name_fa']}")
@@ -0,0 +1,151 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import orjson
+
+from metrics import menu_stream_clients
+
+# Per-connection buffer; a client that falls this far behind is disconnected
+# and catches up from the replay buffer when it reconnects
+MENU_STREAM_QUEUE_SIZE = int(os.getenv("MENU_STREAM_QUEUE_SIZE", "64"))
+MENU_STREAM_REPLAY_SIZE = int(os.getenv("MENU_STREAM_REPLAY_SIZE", "512"))
+MENU_STREAM_HEARTBEAT_SECONDS = float(os.getenv("MENU_STREAM_HEARTBEAT_SECONDS", "15"))
+# Streams are closed after this long and the browser reconnects with
+# Last-Event-ID; bounds graceful shutdown and spreads clients over replicas
+MENU_STREAM_MAX_SECONDS = float(os.getenv("MENU_STREAM_MAX_SECONDS", "300"))
+MENU_STREAM_RETRY_MS = 3000
+
+HEARTBEAT_FRAME = b": ping\n\n"
+
+
+class MenuBroadcaster:
+    """In-process fan-out of menu change events to SSE connections.
+
+    publish() may be called from any thread (the sync write endpoints run in
+    the threadpool); each frame is encoded once and handed to every
+    subscriber's queue on the event loop. An idle connection costs one small
+    queue: heartbeats and the MENU_STREAM_MAX_SECONDS cut-off come from a
+    single shared task, not a timer per client.
+
+    Event ids are "<boot epoch>-<sequence>". A reconnecting client sends
+    Last-Event-ID and gets the events it missed from a replay buffer, or a
+    "menu_reloaded" event (refetch /api/menu) when they are no longer there.
+    """
+
+    def __init__(self, queue_size: int = MENU_STREAM_QUEUE_SIZE, replay_size: int = MENU_STREAM_REPLAY_SIZE,
+                 heartbeat_seconds: float = MENU_STREAM_HEARTBEAT_SECONDS,
+                 max_seconds: float = MENU_STREAM_MAX_SECONDS):
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_seconds = max_seconds
+        self.epoch = f"{int(time.time()):x}"
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._replay: Deque[Tuple[int, bytes]] = deque(maxlen=replay_size)
+        # queue -> monotonic time at which the stream is closed
+        self._subscribers: Dict[asyncio.Queue, float] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def publish(self, event: str, data) -> None:
+        with self._lock:
+            self._sequence += 1
+            frame = (
+                f"id: {self.epoch}-{self._sequence}\nevent: {event}\n".encode()
+                + b"data: " + orjson.dumps(data) + b"\n\n"
+            )
+            self._replay.append((self._sequence, frame))
+            # Snapshot under the lock so a client subscribing right now gets
+            # this frame either from the replay or from its queue, not both
+            targets = list(self._subscribers)
+        if targets and self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._fan_out, targets, frame)
+
+    def _fan_out(self, targets: List[asyncio.Queue], frame: bytes):
+        for queue in targets:
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._disconnect(queue)
+
+    def _disconnect(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def _missed(self, last_event_id: Optional[str]) -> Optional[List[bytes]]:
+        """Frames after `last_event_id`, or None if they can't all be replayed."""
+        if not last_event_id:
+            return []
+        epoch, _, sequence = last_event_id.partition("-")
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        if sequence > self._sequence:
+            return None
+        if sequence < self._sequence and (not self._replay or self._replay[0][0] > sequence + 1):
+            return None
+        return [frame for frame_sequence, frame in self._replay if frame_sequence > sequence]
+
+    async def _run_heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            now = time.monotonic()
+            with self._lock:
+                targets = list(self._subscribers.items())
+            for queue, closes_at in targets:
+                if closes_at <= now:
+                    self._disconnect(queue)
+            self._fan_out([queue for queue, closes_at in targets if closes_at > now], HEARTBEAT_FRAME)
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """SSE frames for one client until it disconnects or falls behind."""
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.get_running_loop()
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.create_task(self._run_heartbeat())
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            missed = self._missed(last_event_id)
+            current_id = f"{self.epoch}-{self._sequence}"
+            self._subscribers[queue] = time.monotonic() + self.max_seconds
+        menu_stream_clients.inc()
+        try:
+            yield f"retry: {MENU_STREAM_RETRY_MS}\n\n".encode()
+            if missed is None:
+                yield f"id: {current_id}\nevent: menu_reloaded\ndata: {{}}\n\n".encode()
+            else:
+                for frame in missed:
+                    yield frame
+            while True:
+                frame = await queue.get()
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            with self._lock:
+                self._subscribers.pop(queue, None)
+            menu_stream_clients.dec()
+
+    def close(self):
+        """End every open stream (at shutdown, so the server can exit)."""
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        with self._lock:
+            queues = list(self._subscribers)
+        for queue in queues:
+            self._disconnect(queue)
+
+
+menu_events = MenuBroadcaster()
@@ -0,0 +1,250 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import httpx
+
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "image_cache"))
+# Originals and variants together; least recently served files go first
+IMAGE_CACHE_MAX_BYTES = int(float(os.getenv("IMAGE_CACHE_MAX_MB", "256")) * 1024 * 1024)
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))
+IMAGE_MAX_SOURCE_BYTES = 15 * 1024 * 1024
+# Decoding more pixels than this is refused (Pillow's decompression bomb guard)
+IMAGE_MAX_PIXELS = 50_000_000
+IMAGE_FETCH_TIMEOUT_SECONDS = 10.0
+
+# Requested widths are rounded up to one of these, so an image has at most
+# len(IMAGE_WIDTHS) variants per format however the srcset is written.
+# Covers next/image's default imageSizes and the deviceSizes up to 1200.
+IMAGE_WIDTHS = (64, 128, 256, 384, 640, 828, 1080, 1200)
+DEFAULT_IMAGE_WIDTH = 640
+IMAGE_FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+# URLs that carry the item's current version (?v=) never change content
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+UNVERSIONED_CACHE_CONTROL = "public, max-age=300"
+
+
+class ImageSourceError(Exception):
+    """The original could not be fetched or is not a usable image."""
+
+
+def variant_width(width: int) -> int:
+    for candidate in IMAGE_WIDTHS:
+        if candidate >= width:
+            return candidate
+    return IMAGE_WIDTHS[-1]
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    return "webp" if accept and "image/webp" in accept else "jpeg"
+
+
+def variant_name(url: str, width: int, fmt: str) -> str:
+    # Keyed by the source URL, so a new image_url never serves a stale variant
+    return f"{hashlib.sha256(url.encode()).hexdigest()[:32]}-{width}.{fmt}"
+
+
+# --- Disk cache ---
+
+class DiskCache:
+    """Size-bounded directory of files, evicted least recently used first.
+
+    The LRU order lives in memory and is rebuilt from file mtimes (bumped on
+    every hit) the first time the cache is used. Files are written to a
+    temporary name and renamed, so readers never see a partial file; with
+    several worker processes each keeps its own tally, so the bound is
+    approximate.
+    """
+
+    def __init__(self, directory: str = IMAGE_CACHE_DIR, max_bytes: int = IMAGE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+        self._entries: Optional["OrderedDict[str, int]"] = None
+
+    def _load(self) -> "OrderedDict[str, int]":
+        if self._entries is None:
+            os.makedirs(self.directory, exist_ok=True)
+            files = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.startswith("."):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.name, stat.st_size))
+            self._entries = OrderedDict((name, size) for _, name, size in sorted(files))
+            self.total_bytes = sum(self._entries.values())
+        return self._entries
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            entries = self._load()
+            if name not in entries:
+                return None
+            entries.move_to_end(name)
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as f:
+                body = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by another process
+            with self._lock:
+                self.total_bytes -= entries.pop(name, 0)
+            return None
+        return body
+
+    def put(self, name: str, body: bytes):
+        with self._lock:
+            self._load()
+        temp_path = os.path.join(self.directory, f".{name}.{uuid.uuid4().hex}.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(body)
+        os.replace(temp_path, os.path.join(self.directory, name))
+        with self._lock:
+            entries = self._load()
+            self.total_bytes += len(body) - entries.pop(name, 0)
+            entries[name] = len(body)
+            while self.total_bytes > self.max_bytes and len(entries) > 1:
+                evicted, size = entries.popitem(last=False)
+                self.total_bytes -= size
+                try:
+                    os.remove(os.path.join(self.directory, evicted))
+                except FileNotFoundError:
+                    pass
+
+
+# --- Resizing (runs in the worker processes) ---
+
+def resize_image(data: bytes, width: int, fmt: str, quality: int = IMAGE_QUALITY) -> bytes:
+    """Scale `data` down to `width` (never up) and encode it as WebP or JPEG."""
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = IMAGE_MAX_PIXELS
+    with Image.open(io.BytesIO(data)) as source:
+        # JPEGs can be decoded straight at 1/2, 1/4 or 1/8 scale
+        source.draft("RGB", (width, 1))
+        image = ImageOps.exif_transpose(source)
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        if fmt == "jpeg" and has_alpha:
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image.convert("RGBA"), mask=image.convert("RGBA").getchannel("A"))
+            image = background
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if has_alpha else "RGB")
+
+        out = io.BytesIO()
+        if fmt == "webp":
+            image.save(out, format="WEBP", quality=quality, method=4)
+        else:
+            image.save(out, format="JPEG", quality=quality, optimize=True, progressive=True)
+        return out.getvalue()
+
+
+# --- Store ---
+
+class ImageStore:
+    """Fetches originals once and serves resized variants from a DiskCache.
+
+    Resizing runs in a process pool so it never blocks the event loop or
+    holds the GIL of the web process. Concurrent requests for the same
+    original or variant share one fetch / one resize.
+    """
+
+    def __init__(self, cache: DiskCache, workers: int = IMAGE_WORKERS):
+        self.cache = cache
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, not fork: the web process has threads (threadpool, flushers)
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def _shared(self, key: str, make: Callable[[], Awaitable]):
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(make())
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # A client that disconnects must not cancel work others are waiting on
+        return await asyncio.shield(task)
+
+    async def _fetch(self, url: str) -> bytes:
+        import httpx
+
+        if not url.startswith(("http://", "https://")):
+            raise ImageSourceError("image_url is not an http(s) URL")
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=IMAGE_FETCH_TIMEOUT_SECONDS, follow_redirects=True)
+        try:
+            async with self._client.stream("GET", url) as response:
+                response.raise_for_status()
+                chunks, size = [], 0
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > IMAGE_MAX_SOURCE_BYTES:
+                        raise ImageSourceError("original image is too large")
+                    chunks.append(chunk)
+        except httpx.HTTPStatusError as e:
+            raise ImageSourceError(f"image origin returned HTTP {e.response.status_code}")
+        except httpx.HTTPError as e:
+            raise ImageSourceError(f"could not fetch the original image: {type(e).__name__}")
+        return b"".join(chunks)
+
+    async def _source(self, url: str) -> Tuple[bytes, bool]:
+        name = variant_name(url, 0, "src")
+        data = await asyncio.to_thread(self.cache.get, name)
+        if data is not None:
+            return data, True
+        return await self._shared(name, lambda: self._fetch(url)), False
+
+    async def _render(self, url: str, name: str, width: int, fmt: str) -> bytes:
+        data, cached = await self._source(url)
+        try:
+            body = await asyncio.get_running_loop().run_in_executor(
+                self._get_pool(), resize_image, data, width, fmt, IMAGE_QUALITY)
+        except BrokenProcessPool:
+            self._pool = None
+            raise
+        except Exception as e:
+            print(f"Image resize failed for {url}: {e}")
+            raise ImageSourceError("original is not a usable image")
+        if not cached:
+            # Only keep originals that decoded, so other widths skip the fetch
+            await asyncio.to_thread(self.cache.put, variant_name(url, 0, "src"), data)
+        await asyncio.to_thread(self.cache.put, name, body)
+        return body
+
+    async def variant(self, url: str, width: int, fmt: str) -> bytes:
+        name = variant_name(url, width, fmt)
+        body = await asyncio.to_thread(self.cache.get, name)
+        if body is None:
+            body = await self._shared(name, lambda: self._render(url, name, width, fmt))
+        return body
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+image_store = ImageStore(DiskCache())
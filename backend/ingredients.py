@@ -0,0 +1,123 @@
+from itertools import zip_longest
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select, delete, or_
+
+from models import Ingredient, MenuItem, MenuItemIngredient
+from search import normalize
+
+
+def ingredient_key(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    return " ".join(normalize(name).split()) or None
+
+
+def parse_ingredients(ingredients_en: str, ingredients_fa: str) -> List[Tuple[Optional[str], Optional[str]]]:
+    """Pair up the comma-separated English and Persian lists by position."""
+    names_en = [name.strip() for name in (ingredients_en or "").split(",")]
+    names_fa = [name.strip() for name in (ingredients_fa or "").split(",")]
+    pairs = []
+    for name_en, name_fa in zip_longest(names_en, names_fa):
+        name_en, name_fa = name_en or None, name_fa or None
+        if name_en or name_fa:
+            pairs.append((name_en, name_fa))
+    return pairs
+
+
+def sync_item_ingredients(session: Session, items: Iterable):
+    """Rewrite the ingredient links of `items` from their CSV columns.
+
+    `items` are MenuItem rows (or anything with id/ingredients_en/
+    ingredients_fa). New ingredients are inserted in one batch and all links
+    replaced in one DELETE plus one INSERT. The caller commits.
+    """
+    item_pairs: Dict[int, List[Tuple[Optional[str], Optional[str]]]] = {
+        item.id: parse_ingredients(item.ingredients_en, item.ingredients_fa) for item in items
+    }
+    if not item_pairs:
+        return
+
+    wanted: Dict[str, dict] = {}
+    for pairs in item_pairs.values():
+        for name_en, name_fa in pairs:
+            key = ingredient_key(name_en) or ingredient_key(name_fa)
+            wanted.setdefault(key, {"key": key, "key_fa": ingredient_key(name_fa), "name_en": name_en, "name_fa": name_fa})
+
+    ingredient_ids = {}
+    if wanted:
+        ingredient_ids = dict(session.exec(select(Ingredient.key, Ingredient.id).where(Ingredient.key.in_(list(wanted)))).all())
+        missing = [row for key, row in wanted.items() if key not in ingredient_ids]
+        if missing:
+            session.execute(insert(Ingredient), missing)
+            ingredient_ids.update(session.exec(
+                select(Ingredient.key, Ingredient.id).where(Ingredient.key.in_([row["key"] for row in missing]))
+            ).all())
+
+    session.exec(delete(MenuItemIngredient).where(MenuItemIngredient.menu_item_id.in_(list(item_pairs))))
+    links = {
+        (item_id, ingredient_ids[ingredient_key(name_en) or ingredient_key(name_fa)])
+        for item_id, pairs in item_pairs.items()
+        for name_en, name_fa in pairs
+    }
+    if links:
+        session.execute(insert(MenuItemIngredient), [
+            {"menu_item_id": item_id, "ingredient_id": ingredient_id} for item_id, ingredient_id in links
+        ])
+
+
+# --- Keeping links in step ---
+# Any MenuItem added, changed or deleted through the ORM (endpoints, seed,
+# scripts) gets its links rewritten in the same transaction. Bulk INSERT/
+# UPDATE statements bypass the unit of work and call sync_item_ingredients
+# themselves (menu_io).
+
+INGREDIENT_COLUMNS = ("ingredients_en", "ingredients_fa")
+
+
+@event.listens_for(OrmSession, "before_flush")
+def _unlink_deleted_items(session, flush_context, instances):
+    # Before the item's DELETE, which the links' foreign key would refuse
+    item_ids = [obj.id for obj in session.deleted if isinstance(obj, MenuItem) and obj.id is not None]
+    if item_ids:
+        session.execute(delete(MenuItemIngredient).where(MenuItemIngredient.menu_item_id.in_(item_ids)))
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _link_written_items(session, flush_context):
+    # After the INSERT, so new items have their ids; new/dirty and the
+    # attribute history still describe this flush
+    items = [obj for obj in session.new if isinstance(obj, MenuItem)] + [
+        obj for obj in session.dirty
+        if isinstance(obj, MenuItem) and obj not in session.deleted
+        and any(inspect(obj).attrs[column].history.has_changes() for column in INGREDIENT_COLUMNS)
+    ]
+    if items:
+        sync_item_ingredients(session, items)
+
+
+def ensure_ingredients(session: Session):
+    """Backfill the link table from the CSV columns if it has never been filled."""
+    if session.exec(select(MenuItemIngredient.menu_item_id).limit(1)).first():
+        return
+    # Only the columns it needs: this runs inside migrations, before later
+    # columns of MenuItem exist
+    items = session.exec(
+        select(MenuItem.id, MenuItem.ingredients_en, MenuItem.ingredients_fa)
+        .where(or_(MenuItem.ingredients_en != "", MenuItem.ingredients_fa != ""))
+    ).all()
+    if items:
+        sync_item_ingredients(session, items)
+        session.commit()
+
+
+def items_with_ingredient(names: Iterable[str]):
+    """Subquery of menu item ids linked to any ingredient called one of `names`."""
+    keys = [key for key in (ingredient_key(name) for name in names) if key]
+    return (
+        select(MenuItemIngredient.menu_item_id)
+        .join(Ingredient, Ingredient.id == MenuItemIngredient.ingredient_id)
+        .where(or_(Ingredient.key.in_(keys), Ingredient.key_fa.in_(keys)))
+    )
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import orjson
+from sqlalchemy import literal, select, text, union_all
+from sqlalchemy.engine import make_url
+
+from database import async_engine, dialect_insert, resolve_database_url
+from models import CacheVersion, MenuVersion
+
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "cache_invalidation")
+# How often the version rows are read: the only signal on SQLite, and a
+# safety net for notifications missed while the Postgres listener reconnects
+INVALIDATION_POLL_SECONDS = float(os.getenv("INVALIDATION_POLL_SECONDS", "2"))
+INVALIDATION_PG_POLL_SECONDS = float(os.getenv("INVALIDATION_PG_POLL_SECONDS", "30"))
+LISTEN_RETRY_SECONDS = 5.0
+
+# Identifies this process in notices, so it can ignore its own
+PROCESS_ID = uuid.uuid4().hex[:12]
+
+
+# --- Publishing ---
+# Called inside the write's transaction: Postgres delivers a NOTIFY only
+# when the transaction commits, and drops it on rollback.
+
+def notify(connection, scope: str, version: int):
+    if connection.dialect.name != "postgresql":
+        return
+    payload = orjson.dumps({"scope": scope, "version": version, "origin": PROCESS_ID}).decode()
+    connection.execute(text("SELECT pg_notify(:channel, :payload)"),
+                       {"channel": INVALIDATION_CHANNEL, "payload": payload})
+
+
+def bump_cache_version(connection, scope: str) -> int:
+    """Next version of `scope` ("reviews", "users") plus its notice.
+
+    The menu has its own counter (versions.next_menu_version).
+    """
+    table = CacheVersion.__table__
+    stmt = dialect_insert(table).values(scope=scope, version=1)
+    stmt = stmt.on_conflict_do_update(index_elements=[table.c.scope], set_={"version": table.c.version + 1})
+    version = connection.execute(stmt.returning(table.c.version)).scalar_one()
+    notify(connection, scope, version)
+    return version
+
+
+# --- Listening ---
+
+class InvalidationBus:
+    """Keeps this process's caches in step with writes made by other processes.
+
+    Each scope has a version row (MenuVersion for the menu, CacheVersion for
+    the rest) and a handler, called with the last version this process has
+    seen whenever the row moves. A NOTIFY (Postgres) or the poll timer only
+    wakes the single checker task, so a burst of writes costs one version
+    read and one handler call per scope.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, Callable[[int], Awaitable[None]]] = {}
+        self._seen: Dict[str, int] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, scope: str, handler: Callable[[int], Awaitable[None]]):
+        self._handlers[scope] = handler
+
+    async def read_versions(self) -> Dict[str, int]:
+        statement = union_all(
+            select(literal("menu").label("scope"), MenuVersion.version).where(MenuVersion.id == 1),
+            select(CacheVersion.scope, CacheVersion.version),
+        )
+        async with async_engine.connect() as conn:
+            return {scope: version for scope, version in (await conn.execute(statement)).all()}
+
+    async def check(self):
+        for scope, version in (await self.read_versions()).items():
+            since = self._seen.get(scope, 0)
+            handler = self._handlers.get(scope)
+            if version == since or handler is None:
+                continue
+            try:
+                await handler(since)
+                self._seen[scope] = version
+            except Exception as e:
+                # Retried on the next wake-up
+                print(f"Cache invalidation for {scope} failed: {e}")
+
+    async def start(self):
+        if self._tasks:
+            return
+        # Caches are built from the current data, so start from here
+        self._seen = await self.read_versions()
+        self._wake = asyncio.Event()
+        if async_engine.dialect.name == "postgresql":
+            self._tasks.append(asyncio.create_task(self._listen()))
+            poll_seconds = INVALIDATION_PG_POLL_SECONDS
+        else:
+            poll_seconds = INVALIDATION_POLL_SECONDS
+        if poll_seconds > 0 or self._tasks:
+            self._tasks.append(asyncio.create_task(self._run(poll_seconds)))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def _run(self, poll_seconds: float):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), poll_seconds if poll_seconds > 0 else None)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.check()
+            except Exception as e:
+                print(f"Cache invalidation check failed: {e}")
+
+    def _on_notice(self, connection, pid, channel, payload):
+        try:
+            notice = orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            return
+        if notice.get("origin") != PROCESS_ID:
+            self._wake.set()
+
+    async def _listen(self):
+        import asyncpg
+
+        dsn = make_url(resolve_database_url()).set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            try:
+                conn = await asyncpg.connect(dsn)
+                try:
+                    lost = asyncio.get_running_loop().create_future()
+                    conn.add_termination_listener(lambda _: lost.done() or lost.set_result(None))
+                    await conn.add_listener(INVALIDATION_CHANNEL, self._on_notice)
+                    # Catch up on anything written while we weren't listening
+                    self._wake.set()
+                    await lost
+                finally:
+                    await conn.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Cache invalidation listener disconnected: {e}")
+            await asyncio.sleep(LISTEN_RETRY_SECONDS)
+
+
+invalidation_bus = InvalidationBus()
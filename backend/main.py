@@ -1,14 +1,19 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+import time
+
+# Reported with the "ready" line so cold starts are measured on every boot
+BOOT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session, select, delete, func, text
-from typing import List
+from starlette.concurrency import run_in_threadpool
+from sqlmodel import Session, select, delete
+from typing import List, Optional
 from datetime import timedelta, date as dt_date
 from pydantic import BaseModel
-from sqlalchemy.orm import joinedload
+import orjson
 
-import httpx
-import time
 import os
 from dotenv import load_dotenv
 
@@ -16,12 +21,37 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import from other modules
-from database import create_db_and_tables, get_session
-from models import Category, MenuItem, CategoryRead, User, DailyStat, Review
-from auth import Token, authenticate_user, create_access_token, get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
+from database import get_session, get_async_session, engine, async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from models import Category, MenuItem, MenuItemRead, CategoryRead, User, ReviewRead, Ingredient, IngredientRead
+from auth import Token, authenticate_user_async, create_access_token, get_current_user, principal_cache, ACCESS_TOKEN_EXPIRE_MINUTES
+from cache import menu_cache, etag_matches
+from visits import visit_counter, visit_flusher, visitor_filter, VISIT_DEDUPE_ENABLED
+from ratelimit import login_limiter, visit_limiter, client_ip
+from stats import GRANULARITIES, DEFAULT_RANGE, query_stats
+from orders import OrderEventError, parse_order_batch, record_orders
+from migrate import migrate, check_schema
+from reviews import review_store
+from metrics import MetricsMiddleware, render_metrics, visits_duplicate, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from responses import ORJSONResponse, CompressionMiddleware, choose_encoding, COMPRESSION_MIN_SIZE
+from menu_query import MenuQueryError, parse_fields, query_menu, query_menu_items, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, LIST_FIELDS
+from events import menu_events
+from images import (
+    image_store, ImageSourceError, IMAGE_FORMATS, DEFAULT_IMAGE_WIDTH, IMMUTABLE_CACHE_CONTROL,
+    UNVERSIONED_CACHE_CONTROL, negotiate_format, variant_name, variant_width,
+)
+from versions import menu_changes, local_menu_versions
+from invalidation import invalidation_bus
+from snapshots import snapshot_writer, SNAPSHOT_FILE, MENU_SNAPSHOT_DIR
+from search import search_index, DEFAULT_LIMIT as SEARCH_DEFAULT_LIMIT
+from menu_io import MenuImportError, parse_menu_csv, parse_menu_json, import_menu, iter_menu_csv, iter_menu_json
 
 app = FastAPI(title="Modern Menu API")
 
+# Fill the menu cache before reporting ready, so the first guest after a
+# scale-from-zero does not pay for mapper setup and query compilation
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+
 # --- CORS Configuration ---
 origins = [
     "http://localhost:3000",
@@ -41,29 +71,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for anything over COMPRESSION_MIN_SIZE that isn't already encoded
+app.add_middleware(CompressionMiddleware)
+
+# Outermost, so its latency includes CORS and compression
+app.add_middleware(MetricsMiddleware)
+
 @app.on_event("startup")
 def on_startup():
-    from database import engine
-    print(f"--- STARTUP DATABASE CHECK ---")
-    print(f"Database URL detected: {'YES' if os.getenv('DATABASE_URL') else 'NO'}")
-    print(f"Engine Dialect: {engine.dialect.name}")
-    print(f"-----------------------------")
-    print(f"-----------------------------")
-    create_db_and_tables()
-
-    # --- Schema Migration for DailyStat ---
-    try:
-        with Session(engine) as session:
-            # Check if column exists or just try to add it (Postgres specific: IF NOT EXISTS is for table, for column we need a bit more or just try/except)
-            # Simpler approach for this specific issue: execute raw SQL to add column if not exists
-            # Note: SQLite and Postgres have different syntax for IF NOT EXISTS on column.
-            # But since we are targeting Railway (Postgres), we can use:
-            session.exec(text("ALTER TABLE dailystat ADD COLUMN IF NOT EXISTS total_orders INTEGER DEFAULT 0"))
-            session.commit()
-            print("Migration: 'total_orders' column added/verified.")
-    except Exception as e:
-        print(f"Migration warning: {e}")
-    
+    print(f"Database: {engine.dialect.name} (DATABASE_URL {'set' if os.getenv('DATABASE_URL') else 'not set'})")
+    # Schema changes ship as migrations (python migrate.py, run at release);
+    # boot only checks the version so replicas start without any DDL.
+    if os.getenv("AUTO_MIGRATE", "false").lower() == "true":
+        migrate()
+    print(f"Schema version: {check_schema()}")
+
     # Auto-seed if SEED env var is set (for Railway)
     if os.getenv("SEED", "false").lower() == "true":
         from seed import seed_data
@@ -73,19 +95,58 @@ def on_startup():
         except Exception as e:
             print(f"Error seeding data: {e}")
 
+    visit_flusher.start()
+    snapshot_writer.start()
+
+@app.on_event("startup")
+async def start_review_sync():
+    await review_store.start()
+
+@app.on_event("startup")
+async def start_invalidation_bus():
+    # Before the warm-up: writes landing after this point are caught up on
+    await invalidation_bus.start()
+
+@app.on_event("startup")
+async def warm_up():
+    started = time.perf_counter()
+    if WARMUP_ON_STARTUP:
+        try:
+            snapshot = await menu_cache.aget(build_menu_payload)
+            for encoding in {choose_encoding("br, gzip"), "gzip"}:
+                await run_in_threadpool(snapshot.encoded, encoding)
+            # Compiles the projected/filtered statement used by ?fields= queries
+            async with AsyncSession(async_engine) as session:
+                await query_menu(session, LIST_FIELDS, available=True)
+        except Exception as e:
+            print(f"Warm-up failed: {e}")
+    ready = time.perf_counter()
+    print(f"Ready in {(ready - BOOT_STARTED) * 1000:.0f} ms (warm-up {(ready - started) * 1000:.0f} ms)")
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    # Stops the timer and writes whatever visits are still buffered
+    await run_in_threadpool(visit_flusher.stop)
+    await run_in_threadpool(snapshot_writer.stop)
+    await review_store.stop()
+    await invalidation_bus.stop()
+    menu_events.close()
+    await image_store.close()
+    await async_engine.dispose()
+
 # --- API Endpoints ---
 
 class Token(BaseModel):
     access_token: str
     token_type: str
 
-@app.post("/token", response_model=Token)
+@app.post("/token", response_model=Token, dependencies=[Depends(login_limiter)])
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
-    user = session.exec(select(User).where(User.username == form_data.username)).first()
-    if not user or not authenticate_user(form_data.password, user.hashed_password): # Changed verify_password to authenticate_user
+    user = (await session.exec(select(User).where(User.username == form_data.username))).first()
+    if not user or not await authenticate_user_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -97,12 +158,218 @@ async def login_for_access_token(
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
+async def build_menu_payload() -> bytes:
+    # Row tuples grouped straight into the CategoryRead shape: no ORM
+    # instances and no pydantic validation on a cache miss
+    async with AsyncSession(async_engine) as session:
+        return orjson.dumps(await query_menu(session))
+
+def menu_changed(items=(), deleted_item_ids=(), categories=(), deleted_category_ids=(), rebuild_search=False):
+    """Run after every committed menu write to refresh the derived views.
+
+    Also pushes the change to /api/menu/stream clients; a write that touches
+    many rows (rebuild_search) is sent as a single "menu_reloaded".
+    """
+    menu_cache.invalidate()
+    snapshot_writer.schedule()
+    if rebuild_search:
+        search_index.invalidate()
+        menu_events.publish("menu_reloaded", {})
+    for item in items:
+        search_index.upsert(item)
+        menu_events.publish("item_updated", MenuItemRead.model_validate(item, from_attributes=True).model_dump())
+    for item_id in deleted_item_ids:
+        search_index.remove(item_id)
+        menu_events.publish("item_deleted", {"id": item_id})
+    for category in categories:
+        if not isinstance(category, dict):
+            category = {"id": category.id, "name": category.name, "name_fa": category.name_fa, "slug": category.slug}
+        menu_events.publish("category_changed", category)
+    for category_id in deleted_category_ids:
+        menu_events.publish("category_deleted", {"id": category_id})
+
+# --- Cross-process invalidation ---
+# Writes made by other workers/replicas reach this process through the
+# invalidation bus (NOTIFY on Postgres, polling on SQLite) and go through
+# menu_changed like local ones; versions this process wrote are skipped.
+
+async def apply_remote_menu_changes(since: int):
+    async with AsyncSession(async_engine) as session:
+        changes = await menu_changes(session, since, skip_versions=local_menu_versions())
+    deleted = changes["deleted"]
+    if changes["reset"]:
+        menu_changed(rebuild_search=True)
+    elif changes["items"] or changes["categories"] or deleted["items"] or deleted["categories"]:
+        menu_changed(
+            items=changes["items"], deleted_item_ids=deleted["items"],
+            categories=changes["categories"], deleted_category_ids=deleted["categories"],
+        )
+
+async def reload_reviews(since: int):
+    await review_store.load_snapshot()
+
+async def clear_principals(since: int):
+    principal_cache.clear()
+
+invalidation_bus.register("menu", apply_remote_menu_changes)
+invalidation_bus.register("reviews", reload_reviews)
+invalidation_bus.register("users", clear_principals)
+
+def load_search_items():
+    with Session(engine) as session:
+        return session.exec(select(MenuItem)).all()
+
 @app.get("/api/menu", response_model=List[CategoryRead])
-def read_menu(session: Session = Depends(get_session)):
-    # Use joinedload to fetch items with categories
-    statement = select(Category).options(joinedload(Category.items))
-    results = session.exec(statement)
-    return results.unique().all()
+async def read_menu(
+    request: Request,
+    category: Optional[str] = None,
+    available: Optional[bool] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    include_ingredient: Optional[List[str]] = Query(None),
+    exclude_ingredient: Optional[List[str]] = Query(None),
+    fields: Optional[str] = None,
+):
+    filters = {
+        "category": category, "available": available, "min_price": min_price, "max_price": max_price,
+        "include_ingredients": include_ingredient, "exclude_ingredients": exclude_ingredient,
+    }
+    if fields or any(value is not None for value in filters.values()):
+        # Filtered/projected views read only the requested rows and columns
+        try:
+            columns = parse_fields(fields)
+        except MenuQueryError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        async with AsyncSession(async_engine) as session:
+            return ORJSONResponse(await query_menu(session, columns, **filters))
+
+    # Served from the in-process snapshot; only a cache miss touches the DB
+    snapshot = await menu_cache.aget(build_menu_payload)
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # Compressed once per snapshot instead of once per request
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    if encoding and len(snapshot.body) >= COMPRESSION_MIN_SIZE:
+        body = snapshot.cached_encoding(encoding) or await run_in_threadpool(snapshot.encoded, encoding)
+        headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+@app.get("/api/menu/items")
+async def read_menu_items(
+    category: Optional[str] = None,
+    available: Optional[bool] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    include_ingredient: Optional[List[str]] = Query(None),
+    exclude_ingredient: Optional[List[str]] = Query(None),
+    fields: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    # Flat, cursor-paginated item list; pass next_cursor back to get the next page
+    try:
+        columns = parse_fields(fields)
+        async with AsyncSession(async_engine) as session:
+            page = await query_menu_items(
+                session, columns, limit=limit, cursor=cursor, category=category,
+                available=available, min_price=min_price, max_price=max_price,
+                include_ingredients=include_ingredient, exclude_ingredients=exclude_ingredient,
+            )
+    except MenuQueryError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return ORJSONResponse(page)
+
+@app.get("/api/menu/changes")
+async def read_menu_changes(since: int = Query(0, ge=0), session: AsyncSession = Depends(get_async_session)):
+    # Delta sync: rows with a version above `since` plus deletions; start from
+    # the highest "version" in /api/menu and pass the returned version back
+    return ORJSONResponse(await menu_changes(session, since))
+
+@app.get("/api/menu/manifest")
+async def read_menu_manifest():
+    # Names of the current prerendered menu files (full, fa, en); fetch
+    # base_url + file. "version" can be passed to /api/menu/changes as `since`
+    if snapshot_writer.manifest is None:
+        raise HTTPException(status_code=503, detail="Menu snapshots are not ready")
+    return ORJSONResponse(snapshot_writer.manifest, headers={"Cache-Control": "no-cache"})
+
+@app.get("/static/menu/{name}")
+async def read_menu_snapshot(name: str, accept_encoding: Optional[str] = Header(None)):
+    # Normally served by a CDN or static host from MENU_SNAPSHOT_DIR; this
+    # route covers deployments without one
+    if not SNAPSHOT_FILE.match(name) or not name.endswith(".json"):
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    path = os.path.join(MENU_SNAPSHOT_DIR, name)
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    encoding = choose_encoding(accept_encoding)
+    if encoding is not None:
+        suffix = ".br" if encoding == "br" else ".gz"
+        if os.path.exists(path + suffix):
+            path += suffix
+            headers["Content-Encoding"] = encoding
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return FileResponse(path, media_type="application/json", headers=headers)
+
+@app.get("/api/menu/stream")
+async def menu_stream(last_event_id: Optional[str] = Header(None)):
+    # Server-sent events: item_updated, item_deleted, category_changed,
+    # category_deleted and menu_reloaded (refetch /api/menu)
+    return StreamingResponse(
+        menu_events.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/images/{item_id}")
+async def read_menu_image(
+    item_id: int,
+    w: int = Query(DEFAULT_IMAGE_WIDTH, ge=1, le=4096),
+    format: Optional[str] = Query(None, pattern="^(webp|jpeg)$"),
+    v: Optional[int] = None,
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+):
+    # Resized copy of the item's image_url for srcset; pass the item's
+    # version as `v` to get an immutable URL
+    async with AsyncSession(async_engine) as session:
+        row = (await session.exec(
+            select(MenuItem.image_url, MenuItem.version).where(MenuItem.id == item_id)
+        )).first()
+    if row is None or not row.image_url:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    width = variant_width(w)
+    image_format = format or negotiate_format(accept)
+    headers = {
+        "ETag": f'"{variant_name(row.image_url, width, image_format)}"',
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if v == row.version else UNVERSIONED_CACHE_CONTROL,
+    }
+    if format is None:
+        headers["Vary"] = "Accept"
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        body = await image_store.variant(row.image_url, width, image_format)
+    except ImageSourceError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    return Response(content=body, media_type=IMAGE_FORMATS[image_format], headers=headers)
+
+@app.get("/api/ingredients", response_model=List[IngredientRead])
+async def read_ingredients(session: AsyncSession = Depends(get_async_session)):
+    return (await session.exec(select(Ingredient).order_by(Ingredient.key))).all()
+
+@app.get("/api/menu/search")
+async def search_menu(q: str = Query(..., min_length=1, max_length=100),
+                      limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=100)):
+    # Matches name, description and ingredients in both languages, by prefix
+    if not search_index.ready:
+        await run_in_threadpool(search_index.ensure_built, load_search_items)
+    return ORJSONResponse({"query": q, "results": search_index.search(q, limit)})
 
 # --- Protected Endpoints (Require Login) ---
 
@@ -111,6 +378,7 @@ def create_category(category: Category, current_user: User = Depends(get_current
     session.add(category)
     session.commit()
     session.refresh(category)
+    menu_changed(categories=[category])
     return category
 
 @app.delete("/api/categories/{category_id}")
@@ -118,9 +386,12 @@ def delete_category(category_id: int, current_user: User = Depends(get_current_u
     category = session.get(Category, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
-    session.delete(category)
+    # menuitem.category_id is NOT NULL: items must be moved or deleted first
+    if session.exec(select(MenuItem.id).where(MenuItem.category_id == category_id).limit(1)).first() is not None:
+        raise HTTPException(status_code=409, detail="Category still has menu items")
     session.delete(category)
     session.commit()
+    menu_changed(deleted_category_ids=[category_id])
     return {"message": "Category deleted"}
 
 @app.put("/api/categories/{category_id}")
@@ -136,7 +407,7 @@ def update_category(category_id: int, category_data: Category, current_user: Use
     session.add(category)
     session.commit()
     session.refresh(category)
-    session.refresh(category)
+    menu_changed(categories=[category])
     return category
 
 @app.post("/api/items")
@@ -144,6 +415,7 @@ def create_menu_item(item: MenuItem, current_user: User = Depends(get_current_us
     session.add(item)
     session.commit()
     session.refresh(item)
+    menu_changed(items=[item])
     return item
 
 @app.put("/api/items/{item_id}")
@@ -161,6 +433,7 @@ def update_menu_item(item_id: int, item_data: MenuItem, current_user: User = Dep
     session.add(item)
     session.commit()
     session.refresh(item)
+    menu_changed(items=[item])
     return item
 
 @app.delete("/api/items/{item_id}")
@@ -170,49 +443,92 @@ def delete_menu_item(item_id: int, current_user: User = Depends(get_current_user
         raise HTTPException(status_code=404, detail="Item not found")
     session.delete(item)
     session.commit()
+    menu_changed(deleted_item_ids=[item_id])
     return {"ok": True}
 
+# --- Bulk Import / Export ---
+
+@app.post("/api/menu/bulk")
+async def bulk_import_menu(request: Request, current_user: User = Depends(get_current_user)):
+    # JSON ({"categories": [...]}) or CSV (one row per item, see menu_io.CSV_COLUMNS)
+    body = await request.body()
+    try:
+        if "csv" in request.headers.get("content-type", ""):
+            menu = parse_menu_csv(body)
+        else:
+            menu = parse_menu_json(body)
+    except MenuImportError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    # The whole import is one transaction on the sync engine
+    result = await run_in_threadpool(import_menu, menu)
+    menu_changed(rebuild_search=True)
+    return result
+
+@app.get("/api/menu/export")
+def export_menu(format: str = Query("csv"), current_user: User = Depends(get_current_user)):
+    if format == "csv":
+        return StreamingResponse(iter_menu_csv(), media_type="text/csv; charset=utf-8",
+                                 headers={"Content-Disposition": 'attachment; filename="menu.csv"'})
+    if format == "json":
+        return StreamingResponse(iter_menu_json(), media_type="application/json")
+    raise HTTPException(status_code=422, detail="format must be csv or json")
+
 # --- Stats Endpoints ---
 
 @app.get("/api/stats")
-def get_stats(current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    print(f"DEBUG: get_stats called for user: {current_user.username}")
-    
-    # 1. Total Counts
-    total_items = session.exec(select(MenuItem)).all()
-    total_categories = session.exec(select(Category)).all()
-    print(f"DEBUG: Found {len(total_items)} items, {len(total_categories)} categories")
-    
-    # 2. Daily Stats (Last 7 days)
-    stats = session.exec(select(DailyStat)).all()
-    print(f"DEBUG: Raw stats from DB: {stats}")
-    
-    # Sort by date
-    stats = sorted(stats, key=lambda x: x.date)
-    print(f"DEBUG: Sorted stats: {stats}")
-    
-    return {
-        "total_items": len(total_items),
-        "total_categories": len(total_categories),
-        "daily_stats": stats
-    }
+def get_stats(
+    from_date: Optional[dt_date] = Query(None, alias="from"),
+    to_date: Optional[dt_date] = Query(None, alias="to"),
+    granularity: str = Query("day"),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=422, detail=f"granularity must be one of {', '.join(GRANULARITIES)}")
+    to_date = to_date or dt_date.today()
+    from_date = from_date or to_date - DEFAULT_RANGE[granularity]
+    if from_date > to_date:
+        raise HTTPException(status_code=422, detail="'from' must not be after 'to'")
 
-@app.post("/api/track-visit")
-def track_visit(session: Session = Depends(get_session)):
-    from datetime import date
-    today = date.today()
-    
-    stat = session.get(DailyStat, today)
-    if not stat:
-        stat = DailyStat(date=today, total_visits=1)
-        session.add(stat)
-    else:
-        stat.total_visits += 1
-        session.add(stat)
-    
-    session.commit()
+    # Make today's buffered visits visible to the dashboard
+    visit_flusher.flush()
+    return ORJSONResponse(query_stats(session, from_date, to_date, granularity))
+
+@app.post("/api/orders/events")
+async def record_order_events(request: Request, current_user: User = Depends(get_current_user)):
+    # {"orders": [{"id", "ordered_at", "items": [{"item_id", "quantity", "unit_price"}]}]}
+    # from the till; resending a batch is safe, recorded orders are skipped
+    try:
+        batch = parse_order_batch(await request.body())
+        return await run_in_threadpool(record_orders, batch)
+    except OrderEventError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@app.post("/api/track-visit", dependencies=[Depends(visit_limiter)])
+async def track_visit(request: Request, user_agent: Optional[str] = Header(None)):
+    # Buffered in memory; VisitFlusher writes the totals to DailyStat.
+    # A visitor (IP + browser) is counted once a day.
+    if VISIT_DEDUPE_ENABLED and not visitor_filter.add(f"{client_ip(request)}|{user_agent or ''}"):
+        visits_duplicate.inc()
+        return {"ok": True}
+    visit_counter.add()
     return {"ok": True}
 
+# --- Reviews ---
+
+@app.get("/api/reviews", response_model=List[ReviewRead])
+async def read_reviews():
+    # Never waits on Google; stale snapshots are refreshed in the background
+    return Response(content=await review_store.get(), media_type="application/json")
+
+# --- Metrics ---
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    # Prometheus text format: per-route latency, in-flight requests, DB usage
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/")
 def root():
     return {"status": "online", "docs": "/docs"}
@@ -221,4 +537,7 @@ if __name__ == "__main__":
     import uvicorn
     import os
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
+    # Open /api/menu/stream connections would otherwise hold shutdown for up
+    # to MENU_STREAM_MAX_SECONDS
+    uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True,
+                timeout_graceful_shutdown=int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", "10")))
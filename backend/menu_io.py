@@ -0,0 +1,194 @@
+import csv
+import io
+import json
+from typing import Dict, Iterator
+
+from pydantic import ValidationError
+from sqlalchemy import insert, update
+from sqlmodel import Session, select
+
+from database import engine
+from ingredients import sync_item_ingredients
+from versions import next_menu_version
+from models import Category, MenuItem, MenuImport, CategoryImport, MenuItemImport
+
+ITEM_COLUMNS = tuple(MenuItemImport.model_fields)
+CSV_COLUMNS = ("category_slug", "category_name", "category_name_fa") + ITEM_COLUMNS
+EXPORT_BATCH_SIZE = 500
+
+
+class MenuImportError(ValueError):
+    pass
+
+
+# --- Parsing ---
+
+def parse_menu_json(body: bytes) -> MenuImport:
+    try:
+        return MenuImport.model_validate_json(body)
+    except ValidationError as e:
+        raise MenuImportError(str(e))
+
+
+def parse_menu_csv(body: bytes) -> MenuImport:
+    """One row per item; rows with an empty `name` only declare a category."""
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise MenuImportError("CSV must be UTF-8 encoded")
+
+    categories: Dict[str, dict] = {}
+    for line, row in enumerate(csv.DictReader(io.StringIO(text)), start=2):
+        # Empty cells fall back to the model defaults
+        values = {key: value for key, value in row.items() if key and value not in (None, "")}
+        slug = values.pop("category_slug", None)
+        if not slug:
+            raise MenuImportError(f"line {line}: category_slug is required")
+        category = categories.setdefault(slug, {"slug": slug, "name": slug, "name_fa": None, "items": []})
+        category["name"] = values.pop("category_name", category["name"])
+        category["name_fa"] = values.pop("category_name_fa", category["name_fa"])
+        if "name" not in values:
+            continue
+        try:
+            category["items"].append(MenuItemImport.model_validate(values))
+        except ValidationError as e:
+            raise MenuImportError(f"line {line}: {e}")
+
+    return MenuImport(categories=[CategoryImport(**category) for category in categories.values()])
+
+
+# --- Import ---
+
+def apply_menu_import(session: Session, menu: MenuImport) -> dict:
+    """Upsert categories by slug and items by (category, name) in batches.
+
+    Existing keys are looked up with one query per table, then new rows go
+    out as a single executemany INSERT and changed rows as a bulk UPDATE.
+    The caller owns the transaction.
+    """
+    # A slug or item repeated in the payload: the last occurrence wins
+    categories = {category.slug: category for category in menu.categories}
+    if not categories:
+        return {"categories_created": 0, "categories_updated": 0, "items_created": 0, "items_updated": 0}
+    # Core INSERT/UPDATE skip the ORM flush hook, so stamp the rows here
+    version = next_menu_version(session)
+
+    category_ids = dict(session.exec(
+        select(Category.slug, Category.id).where(Category.slug.in_(list(categories)))
+    ).all())
+    new_categories = [
+        {"slug": slug, "name": category.name, "name_fa": category.name_fa, "version": version}
+        for slug, category in categories.items() if slug not in category_ids
+    ]
+    changed_categories = [
+        {"id": category_ids[slug], "name": category.name, "name_fa": category.name_fa, "version": version}
+        for slug, category in categories.items() if slug in category_ids
+    ]
+    if new_categories:
+        session.execute(insert(Category), new_categories)
+        category_ids.update(session.exec(
+            select(Category.slug, Category.id).where(Category.slug.in_([row["slug"] for row in new_categories]))
+        ).all())
+    if changed_categories:
+        session.execute(update(Category), changed_categories)
+
+    item_ids = {
+        (category_id, name): item_id
+        for item_id, category_id, name in session.exec(
+            select(MenuItem.id, MenuItem.category_id, MenuItem.name)
+            .where(MenuItem.category_id.in_(list(category_ids.values())))
+        ).all()
+    }
+    items: Dict[tuple, dict] = {}
+    for slug, category in categories.items():
+        for item in category.items:
+            row = item.model_dump()
+            row["category_id"] = category_ids[slug]
+            row["version"] = version
+            items[(row["category_id"], row["name"])] = row
+
+    new_items = [row for key, row in items.items() if key not in item_ids]
+    changed_items = [{"id": item_ids[key], **row} for key, row in items.items() if key in item_ids]
+    if new_items:
+        session.execute(insert(MenuItem), new_items)
+    if changed_items:
+        session.execute(update(MenuItem), changed_items)
+
+    if items:
+        imported = session.exec(
+            select(MenuItem.id, MenuItem.name, MenuItem.category_id, MenuItem.ingredients_en, MenuItem.ingredients_fa)
+            .where(MenuItem.category_id.in_(list(category_ids.values())))
+        ).all()
+        sync_item_ingredients(session, [row for row in imported if (row.category_id, row.name) in items])
+
+    return {
+        "categories_created": len(new_categories),
+        "categories_updated": len(changed_categories),
+        "items_created": len(new_items),
+        "items_updated": len(changed_items),
+    }
+
+
+def import_menu(menu: MenuImport) -> dict:
+    with Session(engine) as session:
+        result = apply_menu_import(session, menu)
+        session.commit()
+    return result
+
+
+# --- Export ---
+
+def iter_menu_rows(batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[list]:
+    """Yield batches of flat (category, item) rows without loading the menu.
+
+    Categories with no items produce one row whose item columns are None.
+    """
+    statement = (
+        select(Category.slug, Category.name, Category.name_fa, *[getattr(MenuItem, c) for c in ITEM_COLUMNS])
+        .select_from(Category)
+        .outerjoin(MenuItem, MenuItem.category_id == Category.id)
+        .order_by(Category.id, MenuItem.id)
+        .execution_options(yield_per=batch_size)
+    )
+    with Session(engine) as session:
+        for batch in session.exec(statement).partitions():
+            yield batch
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+def iter_menu_csv() -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for batch in iter_menu_rows():
+        writer.writerows([_csv_cell(value) for value in row] for row in batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def iter_menu_json() -> Iterator[bytes]:
+    """Stream the POST /api/menu/bulk JSON format, one category at a time."""
+    yield b'{"categories":['
+    current = None
+    first = True
+    for batch in iter_menu_rows():
+        for slug, name, name_fa, *item in batch:
+            if current is None or current["slug"] != slug:
+                if current is not None:
+                    yield (b"" if first else b",") + json.dumps(current, ensure_ascii=False).encode("utf-8")
+                    first = False
+                current = {"name": name, "name_fa": name_fa, "slug": slug, "items": []}
+            if item[0] is not None:
+                current["items"].append(dict(zip(ITEM_COLUMNS, item)))
+    if current is not None:
+        yield (b"" if first else b",") + json.dumps(current, ensure_ascii=False).encode("utf-8")
+    yield b"]}"
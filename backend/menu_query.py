@@ -0,0 +1,144 @@
+import base64
+from typing import List, Optional, Tuple
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ingredients import items_with_ingredient
+from models import Category, CategoryRead, MenuItem, MenuItemRead
+
+ITEM_FIELDS = tuple(MenuItemRead.model_fields)
+CATEGORY_FIELDS = tuple(field for field in CategoryRead.model_fields if field != "items")
+# Enough for a menu list/grid; descriptions and ingredients load on demand
+LIST_FIELDS = ("id", "category_id", "name", "name_fa", "price", "rating", "calories", "time", "image_url", "is_available")
+FIELD_PRESETS = {"full": ITEM_FIELDS, "list": LIST_FIELDS}
+# Always selected: needed to group items and to build cursors
+REQUIRED_FIELDS = ("id", "category_id")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Item rows fetched per round trip when reading a whole menu
+ITEM_PARTITION_SIZE = 1000
+
+
+class MenuQueryError(ValueError):
+    pass
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """`fields=list`, `fields=full` or a comma-separated list of item fields."""
+    if not fields:
+        return ITEM_FIELDS
+    if fields in FIELD_PRESETS:
+        return FIELD_PRESETS[fields]
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in ITEM_FIELDS]
+    if unknown:
+        raise MenuQueryError(f"Unknown fields: {', '.join(unknown)}")
+    # Keep the model's column order so every response has the same layout
+    return tuple(field for field in ITEM_FIELDS if field in requested or field in REQUIRED_FIELDS)
+
+
+def encode_cursor(item_id: int) -> str:
+    return base64.urlsafe_b64encode(str(item_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except ValueError:
+        raise MenuQueryError("Invalid cursor")
+
+
+def item_statement(fields: Tuple[str, ...], category: Optional[str] = None, available: Optional[bool] = None,
+                   min_price: Optional[float] = None, max_price: Optional[float] = None,
+                   include_ingredients: Optional[List[str]] = None, exclude_ingredients: Optional[List[str]] = None):
+    """SELECT of just `fields`, filtered on the indexed menuitem columns.
+
+    Ingredient filters go through the indexed ingredient link table: an item
+    must contain every included ingredient and none of the excluded ones.
+    """
+    table = MenuItem.__table__
+    statement = select(*[table.c[field] for field in fields])
+    if category is not None:
+        category_id = select(Category.id).where(Category.slug == category).scalar_subquery()
+        statement = statement.where(table.c.category_id == category_id)
+    if available is not None:
+        statement = statement.where(table.c.is_available == available)
+    if min_price is not None:
+        statement = statement.where(table.c.price >= min_price)
+    if max_price is not None:
+        statement = statement.where(table.c.price <= max_price)
+    for name in include_ingredients or ():
+        statement = statement.where(table.c.id.in_(items_with_ingredient([name])))
+    if exclude_ingredients:
+        statement = statement.where(table.c.id.not_in(items_with_ingredient(exclude_ingredients)))
+    return statement
+
+
+# --- Menu documents ---
+# The /api/menu shape is built from plain row tuples in one pass over the
+# items, without ORM instances (identity map, relationship state) or a
+# pydantic round trip. Keys follow CategoryRead/MenuItemRead.
+
+def menu_statements(fields: Tuple[str, ...], category: Optional[str] = None, **filters):
+    """(categories, items) SELECTs for the /api/menu shape, both ordered by id."""
+    table = Category.__table__
+    categories = select(*[table.c[field] for field in CATEGORY_FIELDS]).order_by(table.c.id)
+    if category is not None:
+        categories = categories.where(table.c.slug == category)
+    return categories, item_statement(fields, category, **filters).order_by(MenuItem.__table__.c.id)
+
+
+def _menu_categories(rows) -> dict:
+    return {row[0]: {**dict(zip(CATEGORY_FIELDS, row)), "items": []} for row in rows}
+
+
+def _add_items(categories: dict, rows, fields: Tuple[str, ...]):
+    category_index = fields.index("category_id")
+    for row in rows:
+        # Categories and items are two statements, so on READ COMMITTED an
+        # item can belong to a category committed after the first one ran;
+        # like the join from Category, items without a known category are
+        # left out (the write that added them invalidates the cache again)
+        category = categories.get(row[category_index])
+        if category is not None:
+            category["items"].append(dict(zip(fields, row)))
+
+
+async def query_menu(session: AsyncSession, fields: Tuple[str, ...] = ITEM_FIELDS, category: Optional[str] = None,
+                     **filters) -> list:
+    """The /api/menu shape (categories with nested items), filtered and projected."""
+    categories_statement, items_statement = menu_statements(fields, category, **filters)
+    categories = _menu_categories((await session.exec(categories_statement)).all())
+    if not categories:
+        return []
+    # Streamed, so the rows of a large menu are never all held at once
+    result = await session.stream(items_statement)
+    async for rows in result.partitions(ITEM_PARTITION_SIZE):
+        _add_items(categories, rows, fields)
+    return list(categories.values())
+
+
+def read_menu(connection, fields: Tuple[str, ...] = ITEM_FIELDS) -> list:
+    """query_menu for a sync Connection (background threads, scripts)."""
+    categories_statement, items_statement = menu_statements(fields)
+    categories = _menu_categories(connection.execute(categories_statement))
+    result = connection.execution_options(yield_per=ITEM_PARTITION_SIZE).execute(items_statement)
+    for rows in result.partitions():
+        _add_items(categories, rows, fields)
+    return list(categories.values())
+
+
+async def query_menu_items(session: AsyncSession, fields: Tuple[str, ...], limit: int = DEFAULT_PAGE_SIZE,
+                           cursor: Optional[str] = None, **filters):
+    """One keyset-paginated page of items, ordered by id."""
+    id_column = MenuItem.__table__.c.id
+    statement = item_statement(fields, **filters)
+    if cursor:
+        statement = statement.where(id_column > decode_cursor(cursor))
+    # One extra row tells us whether there is a next page
+    rows = (await session.exec(statement.order_by(id_column).limit(limit + 1))).all()
+    items = [dict(row._mapping) for row in rows[:limit]]
+    next_cursor = encode_cursor(items[-1]["id"]) if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,172 @@
+"""Versioned schema migrations.
+
+Run once per deploy, before the web process starts. On Railway that is the
+pre-deploy command in railway.json (Railway only runs the Procfile's `web`
+process); Heroku-style hosts use the Procfile's `release` line.
+
+    python migrate.py            # apply pending migrations
+    python migrate.py --check    # exit 1 if the database is behind
+    python migrate.py --to 3     # stop at a given version
+
+The app only reads the schema_version row at boot (check_schema) and never
+runs DDL itself.
+"""
+import argparse
+import sys
+
+from sqlalchemy import inspect, select, text
+from sqlmodel import Session, SQLModel
+
+from database import engine, dialect_insert
+from ingredients import ensure_ingredients
+from models import (
+    CacheVersion, Category, DailyStat, Ingredient, ItemSales, MenuItem, MenuItemIngredient, MenuTombstone, MenuVersion,
+    OrderEvent, Review, SchemaVersion, StatRollup, User,
+)
+from stats import ensure_rollups
+
+# Key for pg_advisory_xact_lock, so two deploys never migrate at the same time
+MIGRATION_LOCK_ID = 960096
+
+
+# --- Migrations ---
+# Databases created before this module existed already have some of these
+# tables and columns (create_all + ALTER TABLE at boot), and fresh databases
+# get the current model definitions from create_all, so every step checks
+# before it changes anything.
+
+def _create_tables(conn, *models):
+    SQLModel.metadata.create_all(conn, tables=[model.__table__ for model in models])
+
+
+def initial_tables(conn):
+    _create_tables(conn, User, Category, MenuItem, DailyStat, Review)
+
+
+def dailystat_total_orders(conn):
+    columns = {column["name"] for column in inspect(conn).get_columns("dailystat")}
+    if "total_orders" not in columns:
+        conn.execute(text("ALTER TABLE dailystat ADD COLUMN total_orders INTEGER DEFAULT 0"))
+
+
+def _create_indexes(conn, table, *columns):
+    for index in table.indexes:
+        if any(column in index.columns for column in columns):
+            index.create(conn, checkfirst=True)
+
+
+def menuitem_indexes(conn):
+    _create_indexes(conn, MenuItem.__table__, "category_id", "is_available", "price")
+
+
+def stat_rollups(conn):
+    _create_tables(conn, StatRollup)
+    ensure_rollups(conn)
+
+
+def ingredient_links(conn):
+    _create_tables(conn, Ingredient, MenuItemIngredient)
+    with Session(bind=conn) as session:
+        ensure_ingredients(session)
+
+
+def menu_versions(conn):
+    for table in (Category.__table__, MenuItem.__table__):
+        columns = {column["name"] for column in inspect(conn).get_columns(table.name)}
+        if "version" not in columns:
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
+        _create_indexes(conn, table, "version")
+    _create_tables(conn, MenuVersion, MenuTombstone)
+    if conn.execute(select(MenuVersion.id)).first() is None:
+        conn.execute(MenuVersion.__table__.insert().values(id=1, version=1))
+    # Existing rows all belong to the first version
+    conn.execute(Category.__table__.update().where(Category.__table__.c.version == 0).values(version=1))
+    conn.execute(MenuItem.__table__.update().where(MenuItem.__table__.c.version == 0).values(version=1))
+
+
+def order_events(conn):
+    _create_tables(conn, OrderEvent, ItemSales)
+
+
+def cache_versions(conn):
+    _create_tables(conn, CacheVersion)
+
+
+MIGRATIONS = [
+    (1, "initial tables", initial_tables),
+    (2, "dailystat.total_orders", dailystat_total_orders),
+    (3, "menuitem filter indexes", menuitem_indexes),
+    (4, "stat rollups", stat_rollups),
+    (5, "ingredient link table", ingredient_links),
+    (6, "menu row versions and tombstones", menu_versions),
+    (7, "order events and item sales", order_events),
+    (8, "cache versions", cache_versions),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# --- Runner ---
+
+def schema_version(conn) -> int:
+    if not inspect(conn).has_table(SchemaVersion.__tablename__):
+        return 0
+    version = conn.execute(select(SchemaVersion.version).where(SchemaVersion.id == 1)).scalar()
+    return version or 0
+
+
+def _set_version(conn, version: int):
+    statement = dialect_insert(SchemaVersion.__table__).values(id=1, version=version)
+    conn.execute(statement.on_conflict_do_update(index_elements=["id"], set_={"version": version}))
+
+
+def migrate(target: int = LATEST_VERSION) -> int:
+    """Apply pending migrations up to `target`, each in its own transaction."""
+    SchemaVersion.__table__.create(engine, checkfirst=True)
+    for version, description, apply in MIGRATIONS:
+        if version > target:
+            break
+        with engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_ID})
+            elif conn.dialect.name == "sqlite":
+                # pysqlite only opens a transaction before DML, so without
+                # this a failed migration would keep its DDL
+                conn.exec_driver_sql("BEGIN")
+            # Re-read under the lock: another deploy may have just applied it
+            if schema_version(conn) >= version:
+                continue
+            print(f"Migration {version}: {description}")
+            apply(conn)
+            _set_version(conn, version)
+    with engine.connect() as conn:
+        return schema_version(conn)
+
+
+def check_schema() -> int:
+    """Boot-time check: a single read, no DDL. Raises if migrations are pending."""
+    with engine.connect() as conn:
+        version = schema_version(conn)
+    if version < LATEST_VERSION:
+        raise RuntimeError(
+            f"Database schema is at version {version}, this build needs {LATEST_VERSION}. "
+            f"Run `python migrate.py` first (the pre-deploy command in railway.json)."
+        )
+    if version > LATEST_VERSION:
+        # A newer release already migrated; its migrations stay backward compatible
+        print(f"Schema version {version} is newer than this build ({LATEST_VERSION})")
+    return version
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument("--check", action="store_true", help="only report the schema version")
+    parser.add_argument("--to", type=int, default=LATEST_VERSION, help="target version")
+    args = parser.parse_args()
+
+    if args.check:
+        with engine.connect() as conn:
+            current = schema_version(conn)
+        print(f"Schema version: {current} (latest {LATEST_VERSION})")
+        sys.exit(0 if current >= LATEST_VERSION else 1)
+
+    print(f"Schema version: {migrate(args.to)} (latest {LATEST_VERSION})")
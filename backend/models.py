@@ -1,6 +1,7 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import UniqueConstraint
 from typing import List, Optional
-from datetime import date as dt_date
+from datetime import date as dt_date, datetime
 
 # --- Base Models ---
 class MenuItemBase(SQLModel):
@@ -8,15 +9,16 @@ class MenuItemBase(SQLModel):
     name_fa: Optional[str] = None
     description: Optional[str] = None
     description_fa: Optional[str] = None
-    price: float
+    price: float = Field(index=True)
     rating: float = Field(default=0.0)
     calories: int = Field(default=0)
     time: str = Field(default="")
-    ingredients_en: str = Field(default="") # Comma-separated
-    ingredients_fa: str = Field(default="") # Comma-separated
+    # Comma-separated; also normalized into Ingredient/MenuItemIngredient
+    ingredients_en: str = Field(default="")
+    ingredients_fa: str = Field(default="")
     image_url: Optional[str] = None
-    is_available: bool = Field(default=True)
-    category_id: int = Field(foreign_key="category.id")
+    is_available: bool = Field(default=True, index=True)
+    category_id: int = Field(foreign_key="category.id", index=True)
 
 class CategoryBase(SQLModel):
     name: str
@@ -34,6 +36,14 @@ class DailyStat(SQLModel, table=True):
     total_visits: int = Field(default=0)
     total_orders: int = Field(default=0)
     total_revenue: float = Field(default=0.0)
+
+class StatRollup(SQLModel, table=True):
+    # Weekly/monthly sums of DailyStat, kept current by stats.bump_rollups
+    granularity: str = Field(primary_key=True) # "week" or "month"
+    period_start: dt_date = Field(primary_key=True)
+    total_visits: int = Field(default=0)
+    total_orders: int = Field(default=0)
+    total_revenue: float = Field(default=0.0)
     
 class Review(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -49,6 +59,8 @@ class Review(SQLModel, table=True):
 
 class Category(CategoryBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
+    # MenuVersion.version of the last write to this row (set by versions.py)
+    version: int = Field(default=0, index=True)
     # Exclude items from default repr to avoid recursion if printed
     items: List["MenuItem"] = Relationship(back_populates="category")
 
@@ -57,11 +69,67 @@ class Category(CategoryBase, table=True):
 
 class MenuItem(MenuItemBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
+    version: int = Field(default=0, index=True)
     category: Optional[Category] = Relationship(back_populates="items")
 
     def __repr__(self):
         return f"<MenuItem(name={self.name}, id={self.id})>"
 
+class Ingredient(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # Normalized names used for lookups (see ingredients.ingredient_key)
+    key: str = Field(unique=True, index=True)
+    key_fa: Optional[str] = Field(default=None, index=True)
+    name_en: Optional[str] = None
+    name_fa: Optional[str] = None
+
+class MenuItemIngredient(SQLModel, table=True):
+    menu_item_id: int = Field(foreign_key="menuitem.id", primary_key=True)
+    ingredient_id: int = Field(foreign_key="ingredient.id", primary_key=True, index=True)
+
+class MenuVersion(SQLModel, table=True):
+    # Single row; bumped once per flush that writes a Category or MenuItem
+    id: int = Field(default=1, primary_key=True)
+    version: int = Field(default=0)
+
+class MenuTombstone(SQLModel, table=True):
+    # Deleted rows, so /api/menu/changes can report deletes
+    kind: str = Field(primary_key=True) # "category" or "item"
+    row_id: int = Field(primary_key=True)
+    version: int = Field(index=True)
+
+class CacheVersion(SQLModel, table=True):
+    # Change counters of the other process-local caches ("reviews",
+    # "users"), polled and notified by invalidation.py
+    scope: str = Field(primary_key=True)
+    version: int = Field(default=0)
+
+class OrderEvent(SQLModel, table=True):
+    # Append-only, one row per item of an order. No foreign key to menuitem:
+    # sales history outlives deleted items. The unique key makes a retried
+    # batch a no-op (see orders.record_orders).
+    __table_args__ = (UniqueConstraint("order_id", "menu_item_id"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    order_id: str # chosen by the till, unique per order
+    menu_item_id: int = Field(index=True)
+    quantity: int
+    unit_price: float
+    ordered_at: int # Unix timestamp
+    date: dt_date = Field(index=True) # local day of ordered_at
+
+class ItemSales(SQLModel, table=True):
+    # Running per-item totals of OrderEvent
+    menu_item_id: int = Field(primary_key=True)
+    total_orders: int = Field(default=0)
+    total_quantity: int = Field(default=0)
+    total_revenue: float = Field(default=0.0)
+    last_ordered_at: Optional[int] = None # Unix timestamp
+
+class SchemaVersion(SQLModel, table=True):
+    # Single row holding the last migration applied by migrate.py
+    id: int = Field(default=1, primary_key=True)
+    version: int = Field(default=0)
+
 # --- Read Models ---
 # Explicitly independent models to avoid any Relationship() side effects
 class MenuItemRead(SQLModel):
@@ -79,10 +147,66 @@ class MenuItemRead(SQLModel):
     image_url: Optional[str] = None
     is_available: bool
     category_id: int
+    version: int = 0
 
 class CategoryRead(SQLModel):
     id: int
     name: str
     name_fa: Optional[str] = None
     slug: str
-    items: List[MenuItemRead] = []
\ No newline at end of file
+    version: int = 0
+    items: List[MenuItemRead] = []
+
+class ReviewRead(SQLModel):
+    id: int
+    author_name: str
+    rating: int
+    text: str
+    profile_photo_url: str
+    relative_time_description: str
+    time: int
+
+class IngredientRead(SQLModel):
+    id: int
+    key: str
+    name_en: Optional[str] = None
+    name_fa: Optional[str] = None
+
+# --- Import Models (POST /api/menu/bulk) ---
+class MenuItemImport(SQLModel):
+    name: str
+    name_fa: Optional[str] = None
+    description: Optional[str] = None
+    description_fa: Optional[str] = None
+    price: float
+    rating: float = 0.0
+    calories: int = 0
+    time: str = ""
+    ingredients_en: str = ""
+    ingredients_fa: str = ""
+    image_url: Optional[str] = None
+    is_available: bool = True
+
+class CategoryImport(SQLModel):
+    name: str
+    name_fa: Optional[str] = None
+    slug: str
+    items: List[MenuItemImport] = []
+
+class MenuImport(SQLModel):
+    categories: List[CategoryImport]
+
+# --- Order Events (POST /api/orders/events) ---
+class OrderLineIn(SQLModel):
+    item_id: int
+    quantity: int = Field(default=1, gt=0)
+    # Price actually charged; defaults to the current menu price
+    unit_price: Optional[float] = Field(default=None, ge=0)
+
+class OrderIn(SQLModel):
+    id: str = Field(min_length=1, max_length=64)
+    ordered_at: Optional[datetime] = None
+    items: List[OrderLineIn] = Field(min_length=1)
+
+class OrderBatch(SQLModel):
+    orders: List[OrderIn]
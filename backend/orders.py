@@ -0,0 +1,141 @@
+import os
+import time
+from datetime import date, datetime
+from typing import Dict, List
+
+from pydantic import ValidationError
+from sqlalchemy import case, select
+
+from database import engine, dialect_insert
+from models import DailyStat, ItemSales, MenuItem, OrderBatch, OrderEvent
+from stats import bump_rollups
+
+# Orders per POST /api/orders/events; larger backlogs are sent in several batches
+ORDER_BATCH_MAX = int(os.getenv("ORDER_BATCH_MAX", "1000"))
+
+
+class OrderEventError(ValueError):
+    pass
+
+
+def parse_order_batch(body: bytes) -> OrderBatch:
+    try:
+        batch = OrderBatch.model_validate_json(body)
+    except ValidationError as e:
+        raise OrderEventError(str(e))
+    if len(batch.orders) > ORDER_BATCH_MAX:
+        raise OrderEventError(f"at most {ORDER_BATCH_MAX} orders per batch")
+    return batch
+
+
+# --- Recording ---
+# A batch is one transaction: the events go in with one multi-row INSERT,
+# then DailyStat, the rollups and ItemSales each get one upsert that adds
+# the batch's totals in SQL (col = col + excluded.col), so concurrent tills
+# never overwrite each other. Upsert rows are sorted by key, so two batches
+# touching the same days and items take their row locks in the same order.
+
+def _event_rows(batch: OrderBatch, prices: Dict[int, float], received_at: int) -> List[dict]:
+    rows: Dict[tuple, dict] = {}
+    for order in batch.orders:
+        # Naive timestamps are server-local time; days are bucketed in
+        # server-local time too, like visits (date.today())
+        ordered_at = int(order.ordered_at.timestamp()) if order.ordered_at else received_at
+        day = datetime.fromtimestamp(ordered_at).date()
+        for line in order.items:
+            key = (order.id, line.item_id)
+            unit_price = line.unit_price if line.unit_price is not None else prices[line.item_id]
+            row = rows.get(key)
+            if row is None:
+                rows[key] = {
+                    "order_id": order.id, "menu_item_id": line.item_id, "quantity": line.quantity,
+                    "unit_price": unit_price, "ordered_at": ordered_at, "date": day,
+                }
+            else:
+                # Same item on two lines of one order: keep one row with the
+                # combined quantity and the average price
+                total = row["quantity"] * row["unit_price"] + line.quantity * unit_price
+                row["quantity"] += line.quantity
+                row["unit_price"] = total / row["quantity"]
+    return [rows[key] for key in sorted(rows)]
+
+
+def _greatest(current, new):
+    # Portable, NULL-safe max() of two columns (SQLite has no GREATEST)
+    return case((current.is_(None), new), (new > current, new), else_=current)
+
+
+def upsert_order_totals(conn, events: List[dict]):
+    """Add inserted OrderEvent rows to DailyStat, the rollups and ItemSales."""
+    days: Dict[date, Dict[str, float]] = {}
+    day_orders = set()
+    items: Dict[int, dict] = {}
+    for event in events:
+        revenue = event["quantity"] * event["unit_price"]
+        day = days.setdefault(event["date"], {"total_orders": 0, "total_revenue": 0.0})
+        day["total_revenue"] += revenue
+        if (event["date"], event["order_id"]) not in day_orders:
+            day_orders.add((event["date"], event["order_id"]))
+            day["total_orders"] += 1
+        item = items.setdefault(event["menu_item_id"], {
+            "menu_item_id": event["menu_item_id"], "total_orders": 0, "total_quantity": 0,
+            "total_revenue": 0.0, "last_ordered_at": event["ordered_at"],
+        })
+        item["total_orders"] += 1
+        item["total_quantity"] += event["quantity"]
+        item["total_revenue"] += revenue
+        item["last_ordered_at"] = max(item["last_ordered_at"], event["ordered_at"])
+    if not days:
+        return
+
+    table = DailyStat.__table__
+    stmt = dialect_insert(table).values([
+        {"date": day, "total_visits": 0, **totals} for day, totals in sorted(days.items())
+    ])
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.date],
+        set_={column: table.c[column] + stmt.excluded[column] for column in ("total_orders", "total_revenue")},
+    ))
+    bump_rollups(conn, days)
+
+    table = ItemSales.__table__
+    stmt = dialect_insert(table).values([items[item_id] for item_id in sorted(items)])
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.menu_item_id],
+        set_={
+            **{column: table.c[column] + stmt.excluded[column]
+               for column in ("total_orders", "total_quantity", "total_revenue")},
+            "last_ordered_at": _greatest(table.c.last_ordered_at, stmt.excluded.last_ordered_at),
+        },
+    ))
+
+
+def record_orders(batch: OrderBatch) -> dict:
+    """Record a batch of orders in one transaction.
+
+    Orders already recorded (same order id and item) are skipped, so a till
+    can safely resend a batch whose response it never received.
+    """
+    item_ids = {line.item_id for order in batch.orders for line in order.items}
+    received_at = int(time.time())
+    with engine.begin() as conn:
+        prices = dict(conn.execute(select(MenuItem.id, MenuItem.price).where(MenuItem.id.in_(item_ids))).all())
+        unknown = sorted(item_ids - prices.keys())
+        if unknown:
+            raise OrderEventError(f"unknown menu item ids: {', '.join(map(str, unknown))}")
+
+        rows = _event_rows(batch, prices, received_at)
+        table = OrderEvent.__table__
+        stmt = dialect_insert(table).on_conflict_do_nothing(index_elements=[table.c.order_id, table.c.menu_item_id])
+        inserted = conn.execute(
+            stmt.returning(*[table.c[column] for column in rows[0]]), rows
+        ).mappings().all() if rows else []
+        upsert_order_totals(conn, inserted)
+
+    new_orders = {event["order_id"] for event in inserted}
+    return {
+        "orders_recorded": len(new_orders),
+        "orders_skipped": len(batch.orders) - len(new_orders),
+        "items_recorded": len(inserted),
+        "revenue": sum(event["quantity"] * event["unit_price"] for event in inserted),
+    }
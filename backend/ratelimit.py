@@ -0,0 +1,90 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+from fastapi import HTTPException, Request
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# Requests per minute and burst size per client IP
+LOGIN_RATE_PER_MINUTE = float(os.getenv("LOGIN_RATE_PER_MINUTE", "10"))
+LOGIN_BURST = int(os.getenv("LOGIN_BURST", "5"))
+VISIT_RATE_PER_MINUTE = float(os.getenv("VISIT_RATE_PER_MINUTE", "30"))
+VISIT_BURST = int(os.getenv("VISIT_BURST", "10"))
+# Clients tracked per limiter; the least recently seen are forgotten first
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+# Number of reverse proxies in front of the app. Defaults to 1 on Railway
+# (its edge proxy) and 0 elsewhere; with 0 the socket address is used and
+# X-Forwarded-For is ignored, as a client can forge it.
+_ON_RAILWAY = bool(os.getenv("RAILWAY_ENVIRONMENT_ID") or os.getenv("RAILWAY_ENVIRONMENT"))
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "1" if _ON_RAILWAY else "0"))
+
+_warned_forwarded = False
+
+
+def client_ip(request: Request) -> str:
+    global _warned_forwarded
+    forwarded_header = request.headers.get("x-forwarded-for")
+    if TRUSTED_PROXY_HOPS > 0 and forwarded_header:
+        forwarded = [part.strip() for part in forwarded_header.split(",") if part.strip()]
+        # Each proxy appends the address it saw, so only the last
+        # TRUSTED_PROXY_HOPS entries were not written by the client
+        if len(forwarded) >= TRUSTED_PROXY_HOPS:
+            return forwarded[-TRUSTED_PROXY_HOPS]
+    elif forwarded_header and not _warned_forwarded:
+        _warned_forwarded = True
+        print("X-Forwarded-For received but TRUSTED_PROXY_HOPS is 0: all clients behind "
+              "the proxy share one rate limit; set TRUSTED_PROXY_HOPS to the number of proxies")
+    return request.client.host if request.client else "unknown"
+
+
+class TokenBucketLimiter:
+    """Token bucket per key: `burst` requests at once, refilled at `rate_per_minute`.
+
+    A bucket is two floats (tokens, last refill), refilled lazily when its
+    key is seen. Buckets live in an LRU dict capped at `max_keys`; a
+    forgotten bucket comes back full, which only errs towards allowing.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int = RATE_LIMIT_MAX_CLIENTS):
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def acquire(self, key: str) -> Tuple[bool, float]:
+        """Take a token for `key`: (allowed, seconds until the next token)."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True, 0.0
+            return False, (1 - bucket[0]) / self.rate if self.rate > 0 else math.inf
+
+    async def __call__(self, request: Request):
+        # Used as a route dependency: Depends(limiter)
+        if not RATE_LIMIT_ENABLED:
+            return
+        allowed, retry_after = self.acquire(client_ip(request))
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(min(retry_after, 86400)))},
+            )
+
+
+login_limiter = TokenBucketLimiter(LOGIN_RATE_PER_MINUTE, LOGIN_BURST)
+visit_limiter = TokenBucketLimiter(VISIT_RATE_PER_MINUTE, VISIT_BURST)
@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import os
+import random
+import time
+from typing import TYPE_CHECKING, List, Optional
+
+from pydantic import TypeAdapter
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import async_engine, dialect_insert
+from invalidation import bump_cache_version
+from models import Review, ReviewRead
+
+if TYPE_CHECKING:
+    import httpx
+
+GOOGLE_PLACES_URL = os.getenv("GOOGLE_PLACES_URL", "https://maps.googleapis.com/maps/api/place/details/json")
+GOOGLE_PLACES_API_KEY = os.getenv("GOOGLE_PLACES_API_KEY")
+GOOGLE_PLACE_ID = os.getenv("GOOGLE_PLACE_ID")
+
+# Background sync period, and how old the served snapshot may get before a
+# request triggers a refresh (it is still served while that runs)
+REVIEWS_REFRESH_SECONDS = float(os.getenv("REVIEWS_REFRESH_SECONDS", "3600"))
+REVIEWS_STALE_SECONDS = float(os.getenv("REVIEWS_STALE_SECONDS", "900"))
+REVIEWS_LIMIT = int(os.getenv("REVIEWS_LIMIT", "20"))
+
+UPSTREAM_TIMEOUT_SECONDS = 10.0
+UPSTREAM_CONNECT_TIMEOUT_SECONDS = 3.0
+UPSTREAM_RETRIES = 3
+UPSTREAM_BACKOFF_SECONDS = 0.5
+
+reviews_adapter = TypeAdapter(List[ReviewRead])
+
+
+class UpstreamError(Exception):
+    pass
+
+
+def review_google_id(raw: dict) -> str:
+    # Place Details reviews have no id, but each author reviews a place once
+    key = raw.get("author_url") or f"{raw.get('author_name', '')}|{raw.get('time', 0)}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def parse_place_reviews(payload: dict) -> List[dict]:
+    status = payload.get("status", "OK")
+    if status not in ("OK", "ZERO_RESULTS"):
+        raise UpstreamError(f"Places API status {status}: {payload.get('error_message', '')}")
+    now = int(time.time())
+    return [
+        {
+            "google_id": review_google_id(raw),
+            "author_name": raw.get("author_name", ""),
+            "rating": int(raw.get("rating", 0)),
+            "text": raw.get("text", ""),
+            "profile_photo_url": raw.get("profile_photo_url", ""),
+            "relative_time_description": raw.get("relative_time_description", ""),
+            "time": int(raw.get("time", 0)),
+            "created_at": now,
+            "total_revenue": 0.0,
+        }
+        for raw in payload.get("result", {}).get("reviews", [])
+    ]
+
+
+async def upsert_reviews(rows: List[dict]):
+    """Insert or update reviews by google_id in a single statement."""
+    if not rows:
+        return
+    table = Review.__table__
+    stmt = dialect_insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.google_id],
+        set_={
+            column: stmt.excluded[column]
+            for column in ("author_name", "rating", "text", "profile_photo_url", "relative_time_description", "time")
+        },
+    )
+    async with async_engine.begin() as conn:
+        await conn.execute(stmt)
+        # Other processes reload their snapshot (see invalidation.py)
+        await conn.run_sync(bump_cache_version, "reviews")
+
+
+class ReviewStore:
+    """Serves /api/reviews from memory with stale-while-revalidate refreshes.
+
+    A request never waits on Google: it gets the current snapshot, and if
+    that is older than REVIEWS_STALE_SECONDS a refresh is started in the
+    background. A periodic task also refreshes every REVIEWS_REFRESH_SECONDS.
+    """
+
+    def __init__(self, url: str = GOOGLE_PLACES_URL, api_key: Optional[str] = GOOGLE_PLACES_API_KEY,
+                 place_id: Optional[str] = GOOGLE_PLACE_ID):
+        self.url = url
+        self.api_key = api_key
+        self.place_id = place_id
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._snapshot: Optional[bytes] = None
+        self._loaded_at = 0.0
+        self._refreshing: Optional[asyncio.Task] = None
+        self._periodic: Optional[asyncio.Task] = None
+
+    @property
+    def sync_enabled(self) -> bool:
+        return bool(self.url and self.api_key and self.place_id)
+
+    async def start(self):
+        await self.load_snapshot()
+        if self.sync_enabled:
+            # httpx is only imported when there is something to sync
+            import httpx
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(UPSTREAM_TIMEOUT_SECONDS, connect=UPSTREAM_CONNECT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(max_connections=4, max_keepalive_connections=2),
+            )
+            self._periodic = asyncio.create_task(self._run_periodic())
+
+    async def stop(self):
+        for task in (self._periodic, self._refreshing):
+            if task is not None:
+                task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get(self) -> bytes:
+        if self._snapshot is None:
+            await self.load_snapshot()
+        elif time.monotonic() - self._loaded_at > REVIEWS_STALE_SECONDS:
+            self.revalidate()
+        return self._snapshot
+
+    def revalidate(self):
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self.refresh())
+
+    def invalidate(self):
+        """Force the next request to revalidate the snapshot."""
+        self._loaded_at = 0.0
+
+    async def load_snapshot(self):
+        async with AsyncSession(async_engine) as session:
+            statement = select(Review).order_by(Review.time.desc()).limit(REVIEWS_LIMIT)
+            reviews = (await session.exec(statement)).all()
+            body = reviews_adapter.dump_json(reviews_adapter.validate_python(reviews, from_attributes=True))
+        self._snapshot = body
+        self._loaded_at = time.monotonic()
+
+    async def refresh(self):
+        try:
+            if self.sync_enabled:
+                rows = parse_place_reviews(await self.fetch_place())
+                await upsert_reviews(rows)
+            await self.load_snapshot()
+        except Exception as e:
+            # Keep serving the old snapshot and retry after the stale window
+            self._loaded_at = time.monotonic()
+            print(f"Review sync failed: {e}")
+
+    async def fetch_place(self) -> dict:
+        import httpx
+        params = {"place_id": self.place_id, "fields": "reviews", "key": self.api_key}
+        delay = UPSTREAM_BACKOFF_SECONDS
+        for attempt in range(1, UPSTREAM_RETRIES + 1):
+            try:
+                response = await self._client.get(self.url, params=params)
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise UpstreamError(f"HTTP {response.status_code}")
+                response.raise_for_status()
+                return response.json()
+            except (httpx.TransportError, UpstreamError):
+                if attempt == UPSTREAM_RETRIES:
+                    raise
+            await asyncio.sleep(delay + random.uniform(0, delay))
+            delay *= 2
+
+    async def _run_periodic(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(REVIEWS_REFRESH_SECONDS)
+
+
+review_store = ReviewStore()
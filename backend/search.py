@@ -0,0 +1,183 @@
+import bisect
+import heapq
+import re
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from models import MenuItemRead
+
+# Searchable fields and how much a match in each counts towards the score
+FIELD_WEIGHTS = {
+    "name": 4, "name_fa": 4,
+    "ingredients_en": 2, "ingredients_fa": 2,
+    "description": 1, "description_fa": 1,
+}
+EXACT_MATCH_BONUS = 1
+DEFAULT_LIMIT = 20
+
+ZWNJ = "\u200c"
+_CHAR_MAP = str.maketrans({
+    "\u064a": "\u06cc",  # Arabic yeh -> Persian yeh
+    "\u0649": "\u06cc",  # Alef maksura -> Persian yeh
+    "\u0643": "\u06a9",  # Arabic kaf -> Persian kaf
+    "\u0629": "\u0647",  # Teh marbuta -> heh
+    "\u06c0": "\u0647",  # Heh with yeh above -> heh
+    "\u0623": "\u0627",  # Alef with hamza above -> alef
+    "\u0625": "\u0627",  # Alef with hamza below -> alef
+    "\u0640": None,       # Tatweel
+    **{chr(c): None for c in range(0x064B, 0x0653)},  # Harakat
+    **{chr(0x06F0 + d): str(d) for d in range(10)},   # Persian digits
+    **{chr(0x0660 + d): str(d) for d in range(10)},   # Arabic-Indic digits
+})
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """Fold the Arabic/Persian letter variants and case so both spellings match."""
+    return text.translate(_CHAR_MAP).lower()
+
+
+def tokenize(text: Optional[str]) -> Set[str]:
+    if not text:
+        return set()
+    text = normalize(text)
+    tokens = set(_WORD.findall(text))
+    if ZWNJ in text:
+        # "استیک‌ها" is indexed as its parts and as the joined "استیکها"
+        tokens.update(_WORD.findall(text.replace(ZWNJ, "")))
+    return tokens
+
+
+def query_tokens(query: str) -> List[str]:
+    return _WORD.findall(normalize(query))
+
+
+class SearchIndex:
+    """In-memory inverted index over menu items, updated item by item.
+
+    Each token maps to {item_id: weight}; a sorted token list gives prefix
+    matches, so "keb" finds "kebab". All query tokens must match (AND).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._sorted_tokens: List[str] = []
+        self._item_tokens: Dict[int, Set[str]] = {}
+        self._docs: Dict[int, dict] = {}
+        # Bumped by every change, so a rebuild that read the DB before a
+        # change landed is not marked current (as in MenuCache)
+        self._generation = 0
+        self.ready = False
+
+    def __len__(self):
+        return len(self._docs)
+
+    @staticmethod
+    def _document(item) -> dict:
+        if isinstance(item, dict):
+            return MenuItemRead.model_validate(item).model_dump()
+        return MenuItemRead.model_validate(item, from_attributes=True).model_dump()
+
+    def rebuild(self, items: Iterable, generation: Optional[int] = None):
+        """Replace the index with `items`.
+
+        With `generation` (read before loading `items`), the index is only
+        marked ready if nothing changed since; otherwise the next search
+        rebuilds it again.
+        """
+        with self._lock:
+            self._postings.clear()
+            self._item_tokens.clear()
+            self._docs.clear()
+            for item in items:
+                self._add(self._document(item))
+            self._sorted_tokens = sorted(self._postings)
+            self.ready = generation is None or generation == self._generation
+
+    def ensure_built(self, load_items: Callable[[], Iterable]):
+        """Build from `load_items()` unless the index is already current."""
+        if self.ready:
+            return
+        with self._build_lock:
+            if not self.ready:
+                generation = self._generation
+                self.rebuild(load_items(), generation)
+
+    def invalidate(self):
+        """Mark the index stale so the next search rebuilds it from the DB."""
+        with self._lock:
+            self._generation += 1
+            self.ready = False
+
+    def upsert(self, item):
+        doc = self._document(item)
+        with self._lock:
+            self._generation += 1
+            self._remove(doc["id"])
+            for token in self._add(doc):
+                if len(self._postings[token]) == 1:
+                    bisect.insort(self._sorted_tokens, token)
+
+    def remove(self, item_id: int):
+        with self._lock:
+            self._generation += 1
+            self._remove(item_id)
+
+    def _add(self, doc: dict) -> Set[str]:
+        weights: Dict[str, int] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(doc.get(field)):
+                weights[token] = max(weights.get(token, 0), weight)
+        for token, weight in weights.items():
+            self._postings.setdefault(token, {})[doc["id"]] = weight
+        self._item_tokens[doc["id"]] = set(weights)
+        self._docs[doc["id"]] = doc
+        return set(weights)
+
+    def _remove(self, item_id: int):
+        for token in self._item_tokens.pop(item_id, ()):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(item_id, None)
+            if not posting:
+                del self._postings[token]
+                index = bisect.bisect_left(self._sorted_tokens, token)
+                if index < len(self._sorted_tokens) and self._sorted_tokens[index] == token:
+                    del self._sorted_tokens[index]
+        self._docs.pop(item_id, None)
+
+    def _prefix_scores(self, prefix: str) -> Dict[int, int]:
+        scores: Dict[int, int] = {}
+        tokens = self._sorted_tokens
+        for index in range(bisect.bisect_left(tokens, prefix), len(tokens)):
+            token = tokens[index]
+            if not token.startswith(prefix):
+                break
+            bonus = EXACT_MATCH_BONUS if token == prefix else 0
+            for item_id, weight in self._postings[token].items():
+                scores[item_id] = max(scores.get(item_id, 0), weight + bonus)
+        return scores
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> List[dict]:
+        tokens = query_tokens(query)
+        if not tokens:
+            return []
+        with self._lock:
+            scores: Optional[Dict[int, int]] = None
+            # Rarest-looking (longest) tokens first keeps the intersection small
+            for token in sorted(tokens, key=len, reverse=True):
+                matches = self._prefix_scores(token)
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {item_id: score + matches[item_id] for item_id, score in scores.items() if item_id in matches}
+                if not scores:
+                    return []
+            ranked = heapq.nsmallest(limit, scores.items(), key=lambda pair: (-pair[1], pair[0]))
+            return [{**self._docs[item_id], "score": score} for item_id, score in ranked]
+
+
+search_index = SearchIndex()
@@ -1,6 +1,10 @@
 from sqlmodel import Session, select
-from database import engine, create_db_and_tables
+from database import engine
 from models import Category, MenuItem, User, DailyStat
+from stats import rebuild_rollups
+from migrate import migrate
+import versions  # noqa: F401  stamps menu row versions on flush
+import ingredients  # noqa: F401  keeps ingredient links in step on flush
 from auth import get_password_hash
 from datetime import date, timedelta
 import random
@@ -154,22 +158,11 @@ def seed_data():
             else:
                 pass # Stat exists
         
+        session.commit()
+        rebuild_rollups(session.connection(), [today - timedelta(days=i) for i in range(7)])
         session.commit()
         print("Daily stats verification/seeding complete!")
 
 if __name__ == "__main__":
-    create_db_and_tables() # اطمینان از وجود جداول
-    
-    # --- Schema Migration for DailyStat (Direct Execution Fix) ---
-    try:
-        from database import engine
-        from sqlmodel import Session, text
-        with Session(engine) as session:
-            # Add total_orders column if missing
-            session.exec(text("ALTER TABLE dailystat ADD COLUMN IF NOT EXISTS total_orders INTEGER DEFAULT 0"))
-            session.commit()
-            print("Migration (seed.py): 'total_orders' column added/verified.")
-    except Exception as e:
-        print(f"Migration warning (seed.py): {e}")
-
+    migrate() # اطمینان از وجود جداول
     seed_data()
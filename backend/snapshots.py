@@ -0,0 +1,189 @@
+import gzip
+import hashlib
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import orjson
+from sqlmodel import select
+
+from database import engine
+from menu_query import read_menu
+from models import MenuVersion
+from responses import brotli
+
+MENU_SNAPSHOT_ENABLED = os.getenv("MENU_SNAPSHOT_ENABLED", "true").lower() == "true"
+MENU_SNAPSHOT_DIR = os.getenv(
+    "MENU_SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "menu_snapshots"))
+# Where clients fetch the files: a CDN or static host in front of
+# MENU_SNAPSHOT_DIR, or this app's own /static/menu/ route
+MENU_SNAPSHOT_BASE_URL = os.getenv("MENU_SNAPSHOT_BASE_URL", "/static/menu/")
+# Writes that land within this window are rendered once
+MENU_SNAPSHOT_DEBOUNCE_SECONDS = float(os.getenv("MENU_SNAPSHOT_DEBOUNCE_SECONDS", "0.5"))
+# Superseded files are kept this long for clients holding an older manifest
+MENU_SNAPSHOT_RETAIN_SECONDS = float(os.getenv("MENU_SNAPSHOT_RETAIN_SECONDS", "3600"))
+# Rendered once per change, so compress as hard as the formats allow
+SNAPSHOT_GZIP_LEVEL = 9
+SNAPSHOT_BROTLI_QUALITY = 11
+
+MANIFEST_NAME = "manifest.json"
+SNAPSHOT_FILE = re.compile(r"^menu(-fa|-en)?-[0-9a-f]{16}\.json(\.gz|\.br)?$")
+
+# Fields dropped from each language projection (ids, prices etc. stay)
+LANGUAGE_OMIT = {
+    "fa": {"category": {"name"}, "item": {"name", "description", "ingredients_en"}},
+    "en": {"category": {"name_fa"}, "item": {"name_fa", "description_fa", "ingredients_fa"}},
+}
+
+
+# --- Rendering ---
+
+def render_projections(menu: List[dict]) -> Dict[str, bytes]:
+    """{"full", "fa", "en"} -> JSON body, all from one CategoryRead list."""
+    bodies = {"full": orjson.dumps(menu)}
+    for language, omit in LANGUAGE_OMIT.items():
+        bodies[language] = orjson.dumps([
+            {
+                **{key: value for key, value in category.items() if key not in omit["category"] and key != "items"},
+                "items": [
+                    {key: value for key, value in item.items() if key not in omit["item"]}
+                    for item in category["items"]
+                ],
+            }
+            for category in menu
+        ])
+    return bodies
+
+
+def load_menu() -> tuple:
+    """(menu version, /api/menu as a list of dicts), read in one transaction."""
+    with engine.connect() as conn:
+        version = conn.execute(select(MenuVersion.version).where(MenuVersion.id == 1)).scalar() or 0
+        return version, read_menu(conn)
+
+
+def _write_atomic(path: str, body: bytes):
+    temp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    with open(temp_path, "wb") as f:
+        f.write(body)
+    os.replace(temp_path, path)
+
+
+def _compressed(body: bytes) -> Dict[str, bytes]:
+    variants = {".gz": gzip.compress(body, compresslevel=SNAPSHOT_GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(body, quality=SNAPSHOT_BROTLI_QUALITY)
+    return variants
+
+
+def read_manifest(directory: str = MENU_SNAPSHOT_DIR) -> Optional[dict]:
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), "rb") as f:
+            return orjson.loads(f.read())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return None
+
+
+def write_snapshots(directory: str = MENU_SNAPSHOT_DIR) -> dict:
+    """Render the menu into `directory` and point manifest.json at it.
+
+    File names carry a hash of their content, so a file never changes once
+    written and every process renders the same names for the same menu.
+    Each file is written under a temporary name and renamed, and the
+    manifest goes last, so a reader never sees a partial file or a manifest
+    pointing at a missing one.
+    """
+    os.makedirs(directory, exist_ok=True)
+    version, menu = load_menu()
+    files = {}
+    for projection, body in render_projections(menu).items():
+        prefix = "menu" if projection == "full" else f"menu-{projection}"
+        name = f"{prefix}-{hashlib.sha256(body).hexdigest()[:16]}.json"
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            for suffix, compressed in _compressed(body).items():
+                _write_atomic(path + suffix, compressed)
+            _write_atomic(path, body)
+        files[projection] = name
+
+    manifest = {"version": version, "generated_at": int(time.time()), "base_url": MENU_SNAPSHOT_BASE_URL, "files": files}
+    current = read_manifest(directory)
+    # Another process may have rendered a newer menu in the meantime
+    if current is None or current.get("version", 0) <= version:
+        _write_atomic(os.path.join(directory, MANIFEST_NAME), orjson.dumps(manifest))
+    else:
+        manifest = current
+    _remove_superseded(directory, set(manifest["files"].values()))
+    return manifest
+
+
+def _remove_superseded(directory: str, current: set):
+    cutoff = time.time() - MENU_SNAPSHOT_RETAIN_SECONDS
+    for entry in os.scandir(directory):
+        match = SNAPSHOT_FILE.match(entry.name)
+        if not match:
+            continue
+        base = entry.name[: -len(match.group(2))] if match.group(2) else entry.name
+        if base in current:
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+# --- Writer ---
+
+class SnapshotWriter:
+    """Background thread that re-renders the snapshots after menu changes.
+
+    `schedule()` is cheap and safe from any thread; writes arriving within
+    MENU_SNAPSHOT_DEBOUNCE_SECONDS of each other are rendered once.
+    """
+
+    def __init__(self, directory: str = MENU_SNAPSHOT_DIR, debounce: float = MENU_SNAPSHOT_DEBOUNCE_SECONDS):
+        self.directory = directory
+        self.debounce = debounce
+        self.manifest: Optional[dict] = None
+        self._pending = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None or not MENU_SNAPSHOT_ENABLED:
+            return
+        self.manifest = read_manifest(self.directory)
+        self._stop.clear()
+        # Render once at boot: the menu may have changed while we were down
+        self._pending.set()
+        self._thread = threading.Thread(target=self._run, name="menu-snapshots", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._pending.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def schedule(self):
+        self._pending.set()
+
+    def _run(self):
+        while True:
+            self._pending.wait()
+            # A pending render is dropped on stop; the next start renders anyway
+            if self._stop.wait(self.debounce):
+                return
+            self._pending.clear()
+            try:
+                self.manifest = write_snapshots(self.directory)
+            except Exception as e:
+                print(f"Menu snapshot failed: {e}")
+
+
+snapshot_writer = SnapshotWriter()
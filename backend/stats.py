@@ -0,0 +1,153 @@
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlmodel import Session, select, delete, func
+
+from database import dialect_insert
+from models import Category, MenuItem, DailyStat, StatRollup
+
+GRANULARITIES = ("day", "week", "month")
+ROLLUP_GRANULARITIES = ("week", "month")
+STAT_COLUMNS = ("total_visits", "total_orders", "total_revenue")
+
+# How far back /api/stats looks when no `from` is given
+DEFAULT_RANGE = {
+    "day": timedelta(days=6),
+    "week": timedelta(weeks=11),
+    "month": timedelta(days=365),
+}
+
+
+def period_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def period_end(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return period_start(day, "week") + timedelta(days=6)
+    if granularity == "month":
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    return day
+
+
+def _rollup_rows(day_totals: Dict[date, Dict[str, float]]):
+    rows: Dict[tuple, Dict[str, float]] = {}
+    for day, totals in day_totals.items():
+        for granularity in ROLLUP_GRANULARITIES:
+            key = (granularity, period_start(day, granularity))
+            row = rows.setdefault(key, {column: 0 for column in STAT_COLUMNS})
+            for column in STAT_COLUMNS:
+                row[column] += totals.get(column, 0)
+    return [
+        {"granularity": granularity, "period_start": start, **totals}
+        for (granularity, start), totals in rows.items()
+    ]
+
+
+def bump_rollups(conn, day_deltas: Dict[date, Dict[str, float]]):
+    """Add per-day deltas (e.g. {"total_visits": 3}) to the week/month rollups.
+
+    Runs as one upsert, so call it in the same transaction as the DailyStat
+    write it mirrors.
+    """
+    rows = _rollup_rows(day_deltas)
+    if not rows:
+        return
+    table = StatRollup.__table__
+    stmt = dialect_insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.granularity, table.c.period_start],
+        set_={column: table.c[column] + stmt.excluded[column] for column in STAT_COLUMNS},
+    )
+    conn.execute(stmt)
+
+
+def rebuild_rollups(conn, days: Optional[Iterable[date]] = None):
+    """Recompute the rollups covering `days` (or everything) from DailyStat.
+
+    Used for the initial backfill and after code that overwrites DailyStat
+    rows instead of adding to them (e.g. seed.py).
+    """
+    table = DailyStat.__table__
+    rollup = StatRollup.__table__
+    query = select(table.c.date, *[table.c[column] for column in STAT_COLUMNS])
+    clear = delete(rollup)
+    keys = None
+    if days is not None:
+        keys = {(g, period_start(day, g)) for day in days for g in ROLLUP_GRANULARITIES}
+        if not keys:
+            return
+        # Load every day of every affected week/month, not just `days`
+        start = min(start for _, start in keys)
+        end = max(period_end(start, g) for g, start in keys)
+        query = query.where(table.c.date >= start, table.c.date <= end)
+        for granularity in ROLLUP_GRANULARITIES:
+            starts = [start for g, start in keys if g == granularity]
+            conn.execute(clear.where(rollup.c.granularity == granularity, rollup.c.period_start.in_(starts)))
+    else:
+        conn.execute(clear)
+
+    day_totals = {
+        row.date: {column: getattr(row, column) for column in STAT_COLUMNS}
+        for row in conn.execute(query)
+    }
+    rows = _rollup_rows(day_totals)
+    if keys is not None:
+        rows = [row for row in rows if (row["granularity"], row["period_start"]) in keys]
+    if rows:
+        conn.execute(rollup.insert(), rows)
+
+
+def ensure_rollups(conn):
+    """Backfill the rollup table once if it is empty but DailyStat is not."""
+    has_rollups = conn.execute(select(StatRollup.__table__.c.period_start).limit(1)).first()
+    has_daily = conn.execute(select(DailyStat.__table__.c.date).limit(1)).first()
+    if has_daily and not has_rollups:
+        rebuild_rollups(conn)
+
+
+def query_stats(session: Session, start: date, end: date, granularity: str):
+    total_items, total_categories = session.exec(select(
+        select(func.count()).select_from(MenuItem).scalar_subquery(),
+        select(func.count()).select_from(Category).scalar_subquery(),
+    )).one()
+
+    # Plain columns, not ORM rows: nothing here is modified
+    if granularity == "day":
+        table = DailyStat.__table__
+        date_column = table.c.date
+        statement = select(date_column, *[table.c[column] for column in STAT_COLUMNS]).where(
+            date_column >= start, date_column <= end)
+    else:
+        table = StatRollup.__table__
+        date_column = table.c.period_start
+        statement = select(date_column, *[table.c[column] for column in STAT_COLUMNS]).where(
+            table.c.granularity == granularity,
+            date_column >= period_start(start, granularity),
+            date_column <= end,
+        )
+    series = [
+        {"date": row[0], **dict(zip(STAT_COLUMNS, row[1:]))}
+        for row in session.exec(statement.order_by(date_column))
+    ]
+
+    sums = session.exec(
+        select(*[func.coalesce(func.sum(getattr(DailyStat, column)), 0) for column in STAT_COLUMNS])
+        .where(DailyStat.date >= start, DailyStat.date <= end)
+    ).one()
+
+    return {
+        "total_items": total_items,
+        "total_categories": total_categories,
+        "granularity": granularity,
+        "from": start,
+        "to": end,
+        "totals": dict(zip(STAT_COLUMNS, sums)),
+        # Kept under this name for the admin dashboard; for week/month each
+        # entry's "date" is the first day of the period
+        "daily_stats": series,
+    }
@@ -0,0 +1,43 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+# Every test run gets its own throwaway SQLite file and cache directories;
+# set before any app module reads its configuration
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}"
+os.environ["MENU_SNAPSHOT_DIR"] = os.path.join(_tmp_dir, "menu_snapshots")
+os.environ["IMAGE_CACHE_DIR"] = os.path.join(_tmp_dir, "image_cache")
+os.environ["SLOW_QUERY_MS"] = "0"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlmodel import Session, delete
+
+from database import engine, async_engine
+from migrate import migrate
+from models import Category, MenuItem, MenuItemIngredient
+
+migrate()
+
+
+@pytest.fixture
+def empty_menu():
+    with Session(engine) as session:
+        session.exec(delete(MenuItemIngredient))
+        session.exec(delete(MenuItem))
+        session.exec(delete(Category))
+        session.commit()
+
+
+def run_async(coroutine):
+    """asyncio.run() that drops the async engine's pooled connections,
+    which belong to the loop that is about to close."""
+    async def run():
+        try:
+            return await coroutine
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(run())
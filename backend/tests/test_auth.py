@@ -0,0 +1,47 @@
+from sqlmodel import Session, select
+
+from auth import get_password_hash, principal_cache
+from database import engine
+from models import CacheVersion, User
+
+
+def users_version(session) -> int:
+    return session.exec(select(CacheVersion.version).where(CacheVersion.scope == "users")).first() or 0
+
+
+def test_user_writes_bump_the_users_version_and_drop_cached_principals():
+    with Session(engine) as session:
+        before = users_version(session)
+        user = User(username="cashier", hashed_password=get_password_hash("first"))
+        session.add(user)
+        session.commit()
+        assert users_version(session) == before + 1
+
+        principal_cache.put("cashier-token", user)
+        assert principal_cache.get("cashier-token") is not None
+        user.hashed_password = get_password_hash("second")
+        session.add(user)
+        session.commit()
+        assert users_version(session) == before + 2
+        assert principal_cache.get("cashier-token") is None
+
+        session.delete(user)
+        session.commit()
+        assert users_version(session) == before + 3
+
+
+def test_rolled_back_user_write_keeps_cached_principals():
+    with Session(engine) as session:
+        user = User(username="waiter", hashed_password=get_password_hash("first"))
+        session.add(user)
+        session.commit()
+        before = users_version(session)
+        principal_cache.put("waiter-token", user)
+        user.hashed_password = get_password_hash("second")
+        session.add(user)
+        session.flush()
+        session.rollback()
+        assert users_version(session) == before
+        assert principal_cache.get("waiter-token") is not None
+        session.delete(session.get(User, user.id))
+        session.commit()
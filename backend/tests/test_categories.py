@@ -0,0 +1,34 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from auth import get_current_user
+from database import engine
+from models import Category, MenuItem, User
+
+
+def test_deleting_a_category_with_items_is_refused(empty_menu):
+    with Session(engine) as session:
+        category = Category(name="Desserts", slug="desserts")
+        session.add(category)
+        session.flush()
+        item = MenuItem(name="Baklava", price=4, category_id=category.id)
+        session.add(item)
+        session.commit()
+        category_id, item_id = category.id, item.id
+
+    import main
+
+    main.app.dependency_overrides[get_current_user] = lambda: User(username="admin", hashed_password="")
+    try:
+        with TestClient(main.app) as client:
+            response = client.delete(f"/api/categories/{category_id}")
+            assert response.status_code == 409
+            with Session(engine) as session:
+                assert session.get(Category, category_id) is not None
+                session.delete(session.get(MenuItem, item_id))
+                session.commit()
+
+            assert client.delete(f"/api/categories/{category_id}").status_code == 200
+            assert client.delete(f"/api/categories/{category_id}").status_code == 404
+    finally:
+        main.app.dependency_overrides.clear()
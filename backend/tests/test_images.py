@@ -0,0 +1,155 @@
+import asyncio
+import io
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+from sqlmodel import Session
+
+from database import engine
+from images import IMMUTABLE_CACHE_CONTROL, UNVERSIONED_CACHE_CONTROL, DiskCache, ImageStore, resize_image, variant_width
+from models import Category, MenuItem
+
+
+def encoded(image: Image.Image, fmt: str) -> bytes:
+    out = io.BytesIO()
+    image.save(out, fmt)
+    return out.getvalue()
+
+
+PHOTO = encoded(Image.new("RGB", (2400, 1600), (200, 80, 30)), "JPEG")
+LOGO = encoded(Image.new("RGBA", (900, 900), (0, 80, 30, 0)), "PNG")
+
+
+@pytest.fixture
+def origin():
+    """Local stand-in for the image host; counts requests per path."""
+    files = {"/photo.jpg": PHOTO, "/logo.png": LOGO}
+    hits = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits[self.path] = hits.get(self.path, 0) + 1
+            body = files.get(self.path)
+            if body is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", hits
+    server.shutdown()
+
+
+def size_of(body: bytes):
+    with Image.open(io.BytesIO(body)) as image:
+        return image.format, image.size
+
+
+# --- Resizing ---
+
+def test_widths_round_up_to_the_fixed_set():
+    assert [variant_width(w) for w in (1, 64, 65, 300, 1200, 5000)] == [64, 64, 128, 384, 1200, 1200]
+
+
+def test_resize_scales_down_and_encodes_the_requested_format():
+    assert size_of(resize_image(PHOTO, 384, "webp")) == ("WEBP", (384, 256))
+    assert size_of(resize_image(PHOTO, 1200, "jpeg")) == ("JPEG", (1200, 800))
+    # Never scaled up
+    assert size_of(resize_image(LOGO, 1080, "webp")) == ("WEBP", (900, 900))
+
+
+def test_jpeg_of_a_transparent_image_is_flattened_onto_white():
+    with Image.open(io.BytesIO(resize_image(LOGO, 64, "jpeg"))) as image:
+        assert image.mode == "RGB"
+        assert all(channel > 245 for channel in image.getpixel((32, 32)))
+
+
+# --- Disk cache ---
+
+def test_disk_cache_evicts_least_recently_used_under_the_byte_cap(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=250)
+    cache.put("a", b"a" * 100)
+    cache.put("b", b"b" * 100)
+    assert cache.get("a") == b"a" * 100
+    cache.put("c", b"c" * 100)
+    assert sorted(os.listdir(tmp_path)) == ["a", "c"]
+    assert cache.get("b") is None
+    assert cache.total_bytes == 200
+
+    # A new process rebuilds the LRU order from the files' mtimes
+    reopened = DiskCache(str(tmp_path), max_bytes=250)
+    os.utime(tmp_path / "a", (1, 1))
+    reopened.put("d", b"d" * 100)
+    assert sorted(os.listdir(tmp_path)) == ["c", "d"]
+
+
+# --- Store ---
+
+def test_concurrent_requests_fetch_and_resize_once(tmp_path, origin):
+    base_url, hits = origin
+    store = ImageStore(DiskCache(str(tmp_path)), workers=1)
+
+    async def run():
+        try:
+            bodies = await asyncio.gather(*[store.variant(f"{base_url}/photo.jpg", 640, "webp") for _ in range(8)])
+            other = await store.variant(f"{base_url}/photo.jpg", 128, "jpeg")
+            return bodies, other
+        finally:
+            await store.close()
+
+    bodies, other = asyncio.run(run())
+    assert len(set(bodies)) == 1
+    assert size_of(bodies[0]) == ("WEBP", (640, 427))
+    assert size_of(other) == ("JPEG", (128, 85))
+    # The second width is cut from the cached original
+    assert hits == {"/photo.jpg": 1}
+    # Original plus two variants
+    assert len(os.listdir(tmp_path)) == 3
+
+
+# --- Endpoint ---
+
+def test_image_endpoint_caching_headers(empty_menu, origin):
+    base_url, hits = origin
+    with Session(engine) as session:
+        category = Category(name="Steaks", slug="steaks")
+        session.add(category)
+        session.flush()
+        item = MenuItem(name="Ribeye", price=10, category_id=category.id, image_url=f"{base_url}/photo.jpg")
+        session.add(item)
+        session.commit()
+        item_id, version = item.id, item.version
+
+    import main
+
+    with TestClient(main.app) as client:
+        versioned = client.get(f"/api/images/{item_id}?w=300&v={version}", headers={"Accept": "image/webp"})
+        assert versioned.status_code == 200
+        assert versioned.headers["content-type"] == "image/webp"
+        assert versioned.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert versioned.headers["vary"].startswith("Accept")
+        assert size_of(versioned.content) == ("WEBP", (384, 256))
+
+        unversioned = client.get(f"/api/images/{item_id}?w=300&format=jpeg")
+        assert unversioned.headers["cache-control"] == UNVERSIONED_CACHE_CONTROL
+        assert "Accept" not in unversioned.headers.get("vary", "")
+
+        revalidated = client.get(f"/api/images/{item_id}?w=300&v={version}",
+                                 headers={"Accept": "image/webp", "If-None-Match": versioned.headers["etag"]})
+        assert revalidated.status_code == 304
+        assert revalidated.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+        assert client.get("/api/images/999999").status_code == 404
+    assert hits == {"/photo.jpg": 1}
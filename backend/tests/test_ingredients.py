@@ -0,0 +1,48 @@
+from sqlmodel import Session, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from conftest import run_async
+from database import engine, async_engine
+from menu_query import LIST_FIELDS, query_menu
+from models import MenuItem, MenuItemIngredient
+from seed import seed_data
+
+
+async def item_names(**filters):
+    async with AsyncSession(async_engine) as session:
+        menu = await query_menu(session, LIST_FIELDS, **filters)
+    return sorted(item["name"] for category in menu for item in category["items"])
+
+
+def link_count(session, item_id=None):
+    statement = select(func.count()).select_from(MenuItemIngredient)
+    if item_id is not None:
+        statement = statement.where(MenuItemIngredient.menu_item_id == item_id)
+    return session.exec(statement).one()
+
+
+def test_seeded_items_are_filterable_by_ingredient(empty_menu):
+    seed_data()
+    with Session(engine) as session:
+        assert link_count(session) == 13
+    assert run_async(item_names(include_ingredients=["Garlic"])) == ["Mirza Ghasemi"]
+    assert run_async(item_names(include_ingredients=["سیر"])) == ["Mirza Ghasemi"]
+    assert "Mirza Ghasemi" not in run_async(item_names(exclude_ingredients=["garlic"]))
+
+
+def test_orm_updates_and_deletes_keep_links_in_step(empty_menu):
+    seed_data()
+    with Session(engine) as session:
+        item = session.exec(select(MenuItem).where(MenuItem.name == "Mirza Ghasemi")).one()
+        item.ingredients_en, item.ingredients_fa = "Eggplant,Garlic,Walnuts", ""
+        session.add(item)
+        session.commit()
+        assert link_count(session, item.id) == 3
+    assert "Mirza Ghasemi" in run_async(item_names(include_ingredients=["Walnuts"]))
+
+    with Session(engine) as session:
+        item = session.exec(select(MenuItem).where(MenuItem.name == "Mirza Ghasemi")).one()
+        item_id = item.id
+        session.delete(item)
+        session.commit()
+        assert link_count(session, item_id) == 0
@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from cache import etag_matches, menu_cache
+from database import engine
+from models import Category, MenuItem
+
+
+def add_item(name: str):
+    with Session(engine) as session:
+        category = Category(name=f"{name} dishes", slug=name.lower())
+        session.add(category)
+        session.flush()
+        session.add(MenuItem(name=name, price=10, category_id=category.id))
+        session.commit()
+    # Direct writes skip main.menu_changed(), so drop the snapshot here
+    menu_cache.invalidate()
+
+
+def test_menu_revalidates_with_etag(empty_menu):
+    import main
+
+    add_item("Kebab")
+    with TestClient(main.app) as client:
+        first = client.get("/api/menu")
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"] == "no-cache"
+        assert "Accept-Encoding" in first.headers["vary"]
+
+        revalidated = client.get("/api/menu", headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated.headers["etag"] == etag
+        assert client.get("/api/menu", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+
+        add_item("Falafel")
+        changed = client.get("/api/menu", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        assert "Falafel" in changed.text
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abcd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
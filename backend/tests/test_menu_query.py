@@ -0,0 +1,42 @@
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from conftest import run_async
+from database import engine, async_engine
+from menu_query import LIST_FIELDS, query_menu, read_menu
+from models import Category, MenuItem
+
+
+def add_menu_with_orphan():
+    with Session(engine) as session:
+        category = Category(name="Seafood", slug="seafood")
+        session.add(category)
+        session.flush()
+        session.add(MenuItem(name="Salmon", price=10, category_id=category.id))
+        # SQLite does not enforce the foreign key, and on Postgres a
+        # category committed between the two SELECTs looks the same
+        session.add(MenuItem(name="Orphan", price=5, category_id=999))
+        session.commit()
+
+
+async def query(**filters):
+    async with AsyncSession(async_engine) as session:
+        return await query_menu(session, **filters)
+
+
+def item_names(menu):
+    return [item["name"] for category in menu for item in category["items"]]
+
+
+def test_query_menu_skips_items_of_unknown_categories(empty_menu):
+    add_menu_with_orphan()
+    assert item_names(run_async(query())) == ["Salmon"]
+    assert item_names(run_async(query(fields=LIST_FIELDS, available=True))) == ["Salmon"]
+
+
+def test_read_menu_skips_items_of_unknown_categories(empty_menu):
+    add_menu_with_orphan()
+    with engine.connect() as conn:
+        menu = read_menu(conn)
+    assert [category["slug"] for category in menu] == ["seafood"]
+    assert item_names(menu) == ["Salmon"]
@@ -0,0 +1,63 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import inspect
+
+import migrate
+from database import build_engine
+
+
+@pytest.fixture
+def fresh_engine(monkeypatch):
+    engine = build_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'migrate.db')}")
+    monkeypatch.setattr(migrate, "engine", engine)
+    yield engine
+    engine.dispose()
+
+
+def version(engine) -> int:
+    with engine.connect() as conn:
+        return migrate.schema_version(conn)
+
+
+def test_migrations_apply_in_steps_and_only_once(fresh_engine, capsys):
+    assert version(fresh_engine) == 0
+    with pytest.raises(RuntimeError, match="schema is at version 0"):
+        migrate.check_schema()
+
+    assert migrate.migrate(target=3) == 3
+    tables = inspect(fresh_engine).get_table_names()
+    assert "menuitem" in tables and "statrollup" not in tables
+    with pytest.raises(RuntimeError, match="schema is at version 3"):
+        migrate.check_schema()
+
+    assert migrate.migrate() == migrate.LATEST_VERSION
+    applied = capsys.readouterr().out
+    assert [f"Migration {n}:" in applied for n in range(1, migrate.LATEST_VERSION + 1)] == [True] * migrate.LATEST_VERSION
+    assert migrate.check_schema() == migrate.LATEST_VERSION
+
+    assert migrate.migrate() == migrate.LATEST_VERSION
+    assert "Migration" not in capsys.readouterr().out
+
+
+def test_failed_migration_keeps_the_previous_version(fresh_engine, monkeypatch):
+    migrate.migrate()
+
+    def broken(conn):
+        conn.exec_driver_sql("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("boom")
+
+    failing = migrate.LATEST_VERSION + 1
+    monkeypatch.setattr(migrate, "MIGRATIONS", migrate.MIGRATIONS + [(failing, "broken", broken)])
+    with pytest.raises(RuntimeError, match="boom"):
+        migrate.migrate(target=failing)
+    assert version(fresh_engine) == migrate.LATEST_VERSION
+    assert "half_done" not in inspect(fresh_engine).get_table_names()
+
+
+def test_newer_schema_is_accepted(fresh_engine):
+    migrate.migrate()
+    with fresh_engine.begin() as conn:
+        migrate._set_version(conn, migrate.LATEST_VERSION + 1)
+    assert migrate.check_schema() == migrate.LATEST_VERSION + 1
@@ -0,0 +1,93 @@
+import threading
+from datetime import date, datetime
+
+import pytest
+from sqlmodel import Session, delete, func, select
+
+from database import engine
+from models import Category, DailyStat, ItemSales, MenuItem, OrderBatch, OrderEvent, StatRollup
+from orders import OrderEventError, parse_order_batch, record_orders
+
+DAY = date(2024, 3, 5)
+
+
+@pytest.fixture
+def menu(empty_menu):
+    with Session(engine) as session:
+        for table in (OrderEvent, ItemSales, DailyStat, StatRollup):
+            session.exec(delete(table))
+        category = Category(name="Grill", slug="grill")
+        session.add(category)
+        session.flush()
+        kebab = MenuItem(name="Kebab", price=10, category_id=category.id)
+        tea = MenuItem(name="Tea", price=2, category_id=category.id)
+        session.add_all([kebab, tea])
+        session.commit()
+        return kebab.id, tea.id
+
+
+def batch(*orders) -> OrderBatch:
+    return OrderBatch.model_validate({"orders": [
+        {"id": order_id, "ordered_at": datetime(DAY.year, DAY.month, DAY.day, 12), "items": items}
+        for order_id, items in orders
+    ]})
+
+
+def totals():
+    with Session(engine) as session:
+        day = session.get(DailyStat, DAY)
+        sales = {row.menu_item_id: row for row in session.exec(select(ItemSales))}
+        events = session.exec(select(func.count()).select_from(OrderEvent)).one()
+    return day, sales, events
+
+
+def test_resent_batch_is_skipped(menu):
+    kebab, tea = menu
+    orders = batch(("A1", [{"item_id": kebab, "quantity": 2}, {"item_id": tea}]),
+                   ("A2", [{"item_id": tea, "quantity": 3, "unit_price": 1.5}]))
+
+    assert record_orders(orders) == {"orders_recorded": 2, "orders_skipped": 0, "items_recorded": 3, "revenue": 26.5}
+    assert record_orders(orders) == {"orders_recorded": 0, "orders_skipped": 2, "items_recorded": 0, "revenue": 0}
+
+    day, sales, events = totals()
+    assert events == 3
+    assert (day.total_orders, day.total_revenue) == (2, 26.5)
+    assert (sales[kebab].total_orders, sales[kebab].total_quantity, sales[kebab].total_revenue) == (1, 2, 20)
+    assert (sales[tea].total_orders, sales[tea].total_quantity, sales[tea].total_revenue) == (2, 4, 6.5)
+
+
+def test_batch_with_an_unknown_item_records_nothing(menu):
+    kebab, _ = menu
+    with pytest.raises(OrderEventError, match="unknown menu item ids: 999999"):
+        record_orders(batch(("B1", [{"item_id": kebab}]), ("B2", [{"item_id": 999999}])))
+    assert totals() == (None, {}, 0)
+
+
+def test_concurrent_batches_add_up(menu):
+    kebab, tea = menu
+    batches = [batch(*[(f"T{till}-{n}", [{"item_id": kebab}, {"item_id": tea, "quantity": 2}]) for n in range(20)])
+               for till in range(8)]
+    errors = []
+
+    def send(orders):
+        try:
+            record_orders(orders)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=send, args=(orders,)) for orders in batches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    day, sales, events = totals()
+    assert events == 8 * 20 * 2
+    assert (day.total_orders, day.total_revenue) == (160, 160 * 14)
+    assert (sales[kebab].total_quantity, sales[tea].total_quantity) == (160, 320)
+
+
+def test_parse_order_batch_rejects_invalid_json():
+    with pytest.raises(OrderEventError):
+        parse_order_batch(b'{"orders": [{"id": "", "items": []}]}')
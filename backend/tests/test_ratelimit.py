@@ -0,0 +1,35 @@
+from starlette.requests import Request
+
+import ratelimit
+from ratelimit import TokenBucketLimiter, client_ip
+
+
+def request(forwarded=None, host="10.0.0.1"):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "headers": headers, "client": (host, 1234)})
+
+
+def test_client_ip_uses_the_address_the_trusted_proxy_saw(monkeypatch):
+    monkeypatch.setattr(ratelimit, "TRUSTED_PROXY_HOPS", 1)
+    # The client wrote "1.1.1.1"; the proxy appended the real address
+    assert client_ip(request("1.1.1.1, 203.0.113.7")) == "203.0.113.7"
+    assert client_ip(request()) == "10.0.0.1"
+
+
+def test_client_ip_ignores_forwarded_for_without_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(ratelimit, "TRUSTED_PROXY_HOPS", 0)
+    assert client_ip(request("203.0.113.7")) == "10.0.0.1"
+
+
+def test_token_bucket_allows_the_burst_then_refuses():
+    limiter = TokenBucketLimiter(rate_per_minute=60, burst=2)
+    assert [limiter.acquire("a")[0] for _ in range(3)] == [True, True, False]
+    assert 0 < limiter.acquire("a")[1] <= 1
+    assert limiter.acquire("b")[0]
+
+
+def test_token_bucket_memory_is_bounded():
+    limiter = TokenBucketLimiter(rate_per_minute=60, burst=1, max_keys=3)
+    for key in "abcde":
+        limiter.acquire(key)
+    assert list(limiter._buckets) == ["c", "d", "e"]
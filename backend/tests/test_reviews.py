@@ -0,0 +1,145 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import orjson
+import pytest
+from sqlmodel import Session, delete, select
+
+import reviews
+from conftest import run_async
+from database import engine
+from models import Review
+from reviews import ReviewStore, UpstreamError
+
+
+def place(*texts):
+    return {"status": "OK", "result": {"reviews": [
+        {"author_name": f"Guest {i}", "author_url": f"https://maps.example/{i}", "rating": 5,
+         "text": text, "time": 1700000000 + i}
+        for i, text in enumerate(texts)
+    ]}}
+
+
+class Upstream:
+    """Local stand-in for the Places API: replies with the queued
+    (status, payload) pairs in order, repeating the last one."""
+
+    def __init__(self):
+        self.replies = [(200, place())]
+        self.requests = 0
+        self.release = threading.Event()
+        self.release.set()
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                upstream.requests += 1
+                upstream.release.wait(5)
+                status, payload = upstream.replies.pop(0) if len(upstream.replies) > 1 else upstream.replies[0]
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/details/json"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    with Session(engine) as session:
+        session.exec(delete(Review))
+        session.commit()
+    monkeypatch.setattr(reviews, "UPSTREAM_BACKOFF_SECONDS", 0.01)
+
+    async def no_periodic_sync(self):
+        pass
+
+    # Tests drive refresh() themselves
+    monkeypatch.setattr(ReviewStore, "_run_periodic", no_periodic_sync)
+    server = Upstream()
+    yield server
+    server.release.set()
+    server.server.shutdown()
+
+
+async def with_store(upstream, test):
+    store = ReviewStore(url=upstream.url, api_key="key", place_id="place")
+    await store.start()
+    try:
+        return await test(store)
+    finally:
+        await store.stop()
+
+
+def snapshot_texts(body: bytes):
+    return sorted(review["text"] for review in orjson.loads(body))
+
+
+def test_fetch_retries_429_and_5xx_with_backoff(upstream):
+    upstream.replies = [(429, {}), (503, {}), (200, place("Great kebab"))]
+
+    async def test(store):
+        await store.refresh()
+        return await store.get()
+
+    assert snapshot_texts(run_async(with_store(upstream, test))) == ["Great kebab"]
+    assert upstream.requests == 3
+
+
+def test_fetch_gives_up_after_the_last_retry(upstream):
+    upstream.replies = [(500, {})]
+
+    async def test(store):
+        with pytest.raises(UpstreamError):
+            await store.fetch_place()
+
+    run_async(with_store(upstream, test))
+    assert upstream.requests == reviews.UPSTREAM_RETRIES
+
+
+def test_refresh_upserts_by_google_id(upstream):
+    async def test(store):
+        upstream.replies = [(200, place("Good", "Fine"))]
+        await store.refresh()
+        upstream.replies = [(200, place("Good, edited", "Fine"))]
+        await store.refresh()
+        return await store.get()
+
+    assert snapshot_texts(run_async(with_store(upstream, test))) == ["Fine", "Good, edited"]
+    with Session(engine) as session:
+        rows = session.exec(select(Review.google_id, Review.text)).all()
+    assert sorted(text for _, text in rows) == ["Fine", "Good, edited"]
+    assert len({google_id for google_id, _ in rows}) == 2
+
+
+def test_stale_snapshot_is_served_while_refreshing(upstream):
+    async def test(store):
+        upstream.replies = [(200, place("Old"))]
+        await store.refresh()
+
+        upstream.replies = [(200, place("New"))]
+        upstream.release.clear()  # upstream hangs until released
+        store.invalidate()
+        started = time.monotonic()
+        stale = await store.get()
+        assert time.monotonic() - started < 0.5
+        assert snapshot_texts(stale) == ["Old"]
+        # Further requests share the one background refresh
+        assert snapshot_texts(await store.get()) == ["Old"]
+
+        upstream.release.set()
+        await asyncio.wait_for(store._refreshing, 5)
+        return await store.get()
+
+    assert snapshot_texts(run_async(with_store(upstream, test))) == ["New"]
+    assert upstream.requests == 2
@@ -0,0 +1,41 @@
+from search import SearchIndex
+
+
+def item(item_id, name):
+    return {"id": item_id, "name": name, "price": 10, "rating": 0, "calories": 0, "time": "",
+            "ingredients_en": "", "ingredients_fa": "", "is_available": True, "category_id": 1}
+
+
+def result_names(index, query):
+    return [result["name"] for result in index.search(query, 10)]
+
+
+def test_rebuild_racing_an_invalidation_is_not_marked_current():
+    index = SearchIndex()
+
+    def load_during_bulk_import():
+        rows = [item(1, "Kebab")]
+        # The import commits and invalidates after the rows were read
+        index.invalidate()
+        return rows
+
+    index.ensure_built(load_during_bulk_import)
+    assert not index.ready
+
+    index.ensure_built(lambda: [item(1, "Kebab"), item(2, "Kebab Torsh")])
+    assert index.ready
+    assert sorted(result_names(index, "kebab")) == ["Kebab", "Kebab Torsh"]
+
+
+def test_rebuild_racing_an_item_update_is_not_marked_current():
+    index = SearchIndex()
+
+    def load_during_update():
+        rows = [item(1, "Salmon")]
+        index.upsert(item(1, "Grilled Salmon"))
+        return rows
+
+    index.ensure_built(load_during_update)
+    assert not index.ready
+    index.ensure_built(lambda: [item(1, "Grilled Salmon")])
+    assert result_names(index, "grilled") == ["Grilled Salmon"]
@@ -0,0 +1,23 @@
+import os
+import tempfile
+
+from sqlmodel import Session, SQLModel, select
+
+import versions  # noqa: F401  stamps menu row versions on flush
+from database import build_engine
+from models import Category, MenuItem, MenuVersion
+
+
+def test_first_write_creates_the_version_row_without_migrations():
+    # create_all() skips migration 6, which inserts the MenuVersion row
+    engine = build_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'create_all.db')}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        category = Category(name="Seafood", slug="seafood")
+        session.add(category)
+        session.commit()
+        session.add(MenuItem(name="Salmon", price=10, category_id=category.id))
+        session.commit()
+        assert session.exec(select(MenuVersion.version)).all() == [2]
+        assert session.exec(select(MenuItem.version)).one() == 2
+    engine.dispose()
@@ -0,0 +1,142 @@
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import dialect_insert
+from invalidation import notify
+from models import Category, MenuItem, MenuItemRead, MenuTombstone, MenuVersion
+
+VERSIONED = {Category: "category", MenuItem: "item"}
+CATEGORY_FIELDS = ("id", "name", "name_fa", "slug", "version")
+# Versions committed by this process, so the invalidation bus can skip
+# changes it has already applied locally (oldest forgotten first)
+LOCAL_VERSIONS_KEPT = 4096
+
+
+# --- Stamping ---
+# Every flush that writes a Category or MenuItem takes the next MenuVersion
+# and stamps it on the rows it writes; deletes leave a tombstone with it.
+# The UPDATE ... RETURNING holds the version row's lock until commit, so
+# versions become visible in order and a client reading "everything after
+# N" never skips a slower transaction that got a smaller number.
+
+_local_versions: "OrderedDict[int, None]" = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def next_menu_version(session: OrmSession) -> int:
+    """Take the next version in `session`'s transaction and queue its NOTIFY."""
+    connection = session.connection()
+    # An upsert, so databases built without migration 6 (create_all) get
+    # their counter row on the first write
+    table = MenuVersion.__table__
+    statement = dialect_insert(table).values(id=1, version=1)
+    statement = statement.on_conflict_do_update(index_elements=[table.c.id], set_={"version": table.c.version + 1})
+    version = connection.execute(statement.returning(table.c.version)).scalar_one()
+    session.info.setdefault("menu_versions", []).append(version)
+    notify(connection, "menu", version)
+    return version
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _remember_local_versions(session):
+    versions = session.info.pop("menu_versions", None)
+    if versions:
+        with _local_lock:
+            for version in versions:
+                _local_versions[version] = None
+            while len(_local_versions) > LOCAL_VERSIONS_KEPT:
+                _local_versions.popitem(last=False)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _forget_rolled_back_versions(session):
+    # The number is handed out again to the next writer
+    session.info.pop("menu_versions", None)
+
+
+def local_menu_versions() -> Set[int]:
+    with _local_lock:
+        return set(_local_versions)
+
+
+def record_tombstones(connection, kind: str, row_ids, version: int):
+    if not row_ids:
+        return
+    statement = dialect_insert(MenuTombstone.__table__)
+    connection.execute(
+        statement.on_conflict_do_update(index_elements=["kind", "row_id"], set_={"version": statement.excluded.version}),
+        [{"kind": kind, "row_id": row_id, "version": version} for row_id in row_ids],
+    )
+
+
+@event.listens_for(OrmSession, "before_flush")
+def _stamp_menu_writes(session, flush_context, instances):
+    written = [
+        obj for obj in list(session.new) + list(session.dirty)
+        if type(obj) in VERSIONED and (obj in session.new or session.is_modified(obj))
+    ]
+    deleted = [obj for obj in session.deleted if type(obj) in VERSIONED]
+    if not written and not deleted:
+        return
+
+    version = next_menu_version(session)
+    connection = session.connection()
+    for obj in written:
+        obj.version = version
+    for model, kind in VERSIONED.items():
+        record_tombstones(connection, kind, [obj.id for obj in deleted if type(obj) is model], version)
+
+
+# --- Delta sync ---
+
+async def menu_changes(session: AsyncSession, since: int, skip_versions: Iterable[int] = ()) -> dict:
+    """Rows written and deleted after version `since`, up to the current version.
+
+    Clients apply `deleted` before the upserts (SQLite may reuse the id of a
+    deleted row), drop the items of deleted categories, and pass `version`
+    back as the next `since`. `reset` means `since` is ahead of this
+    database (it was restored or recreated), so the client should reload the
+    full menu. Rows written at `skip_versions` are left out.
+    """
+    # Read the bound first: everything at or below it is already committed
+    current: Optional[int] = (await session.exec(select(MenuVersion.version).where(MenuVersion.id == 1))).first()
+    current = current or 0
+    if since > current:
+        return {"version": current, "reset": True, "categories": [], "items": [], "deleted": {"categories": [], "items": []}}
+
+    skip_versions = sorted(version for version in skip_versions if since < version <= current)
+
+    def changed(column):
+        return [column > since, column <= current] + ([column.not_in(skip_versions)] if skip_versions else [])
+
+    category_table, item_table = Category.__table__, MenuItem.__table__
+    categories = (await session.exec(
+        select(*[category_table.c[field] for field in CATEGORY_FIELDS])
+        .where(*changed(category_table.c.version))
+        .order_by(category_table.c.version)
+    )).all()
+    items = (await session.exec(
+        select(*[item_table.c[field] for field in MenuItemRead.model_fields])
+        .where(*changed(item_table.c.version))
+        .order_by(item_table.c.version)
+    )).all()
+    tombstones = (await session.exec(
+        select(MenuTombstone.kind, MenuTombstone.row_id).where(*changed(MenuTombstone.version))
+    )).all()
+
+    return {
+        "version": current,
+        "reset": False,
+        "categories": [dict(row._mapping) for row in categories],
+        "items": [dict(row._mapping) for row in items],
+        "deleted": {
+            "categories": [row_id for kind, row_id in tombstones if kind == "category"],
+            "items": [row_id for kind, row_id in tombstones if kind == "item"],
+        },
+    }
@@ -0,0 +1,155 @@
+import hashlib
+import math
+import os
+import threading
+from datetime import date
+from typing import Dict, Optional
+
+from database import engine, dialect_insert
+from models import DailyStat
+from stats import bump_rollups
+
+FLUSH_INTERVAL_SECONDS = float(os.getenv("VISIT_FLUSH_SECONDS", "5"))
+# Repeat visits by the same visitor on the same day are counted once
+VISIT_DEDUPE_ENABLED = os.getenv("VISIT_DEDUPE_ENABLED", "true").lower() == "true"
+# Distinct visitors per day (per process) the filter is sized for; past
+# that, more first visits get mistaken for repeats
+VISIT_DEDUPE_CAPACITY = int(os.getenv("VISIT_DEDUPE_CAPACITY", "100000"))
+VISIT_DEDUPE_ERROR_RATE = 0.001
+
+
+class VisitCounter:
+    """In-memory visit counter: a dict of per-day counts behind one lock.
+
+    `add()` never touches the database; totals are written to DailyStat by
+    `flush()`, which the VisitFlusher calls on a timer and at shutdown.
+    Visits are counted on the event loop, so the lock is only ever contended
+    by a flush swapping the dict out.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[date, int] = {}
+        self._flush_lock = threading.Lock()
+
+    def add(self, day: Optional[date] = None, n: int = 1):
+        day = day or date.today()
+        with self._lock:
+            self._counts[day] = self._counts.get(day, 0) + n
+
+    def pending(self) -> Dict[date, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def drain(self) -> Dict[date, int]:
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        return counts
+
+    def flush(self) -> int:
+        """Write pending visits with one upsert; returns the number flushed."""
+        with self._flush_lock:
+            totals = self.drain()
+            if not totals:
+                return 0
+            try:
+                with engine.begin() as conn:
+                    upsert_visits(conn, totals)
+            except Exception:
+                # Put the counts back so a failed flush doesn't lose visits
+                for day, n in totals.items():
+                    self.add(day, n)
+                raise
+            return sum(totals.values())
+
+
+class DailyVisitorFilter:
+    """Bloom filter of the visitors seen today, emptied when the day changes.
+
+    Memory is fixed by the capacity (~180 KB for 100k visitors at 0.1%
+    false positives) however many visits arrive. Keys are hashed with a
+    salt that changes daily, so nothing links a visitor across days. Each
+    worker process has its own filter, so with several workers a repeat
+    visit can still be counted once per worker.
+    """
+
+    def __init__(self, capacity: int = VISIT_DEDUPE_CAPACITY, error_rate: float = VISIT_DEDUPE_ERROR_RATE):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._lock = threading.Lock()
+        self._bits = bytearray((self.size + 7) // 8)
+        self._salt = os.urandom(16)
+        self._day: Optional[date] = None
+
+    def add(self, key: str, day: Optional[date] = None) -> bool:
+        """Record `key` for `day`; True if it (probably) wasn't seen that day."""
+        day = day or date.today()
+        with self._lock:
+            if day != self._day:
+                self._bits = bytearray(len(self._bits))
+                self._salt = os.urandom(16)
+                self._day = day
+            digest = hashlib.blake2b(key.encode(), digest_size=16, key=self._salt).digest()
+            # Double hashing: k positions from two 64-bit halves
+            h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+            new = False
+            for i in range(self.hashes):
+                position = (h1 + i * h2) % self.size
+                mask = 1 << (position & 7)
+                if not self._bits[position >> 3] & mask:
+                    self._bits[position >> 3] |= mask
+                    new = True
+            return new
+
+
+def upsert_visits(conn, totals: Dict[date, int]):
+    table = DailyStat.__table__
+    stmt = dialect_insert(table).values([
+        {"date": day, "total_visits": n, "total_orders": 0, "total_revenue": 0.0}
+        for day, n in totals.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.date],
+        set_={"total_visits": table.c.total_visits + stmt.excluded.total_visits},
+    )
+    conn.execute(stmt)
+    bump_rollups(conn, {day: {"total_visits": n} for day, n in totals.items()})
+
+
+class VisitFlusher:
+    """Background thread that flushes a VisitCounter every `interval` seconds."""
+
+    def __init__(self, counter: VisitCounter, interval: float = FLUSH_INTERVAL_SECONDS):
+        self.counter = counter
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="visit-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def flush(self):
+        try:
+            self.counter.flush()
+        except Exception as e:
+            print(f"Visit flush failed: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+
+visit_counter = VisitCounter()
+visit_flusher = VisitFlusher(visit_counter)
+visitor_filter = DailyVisitorFilter()
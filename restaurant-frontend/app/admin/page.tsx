@@ -464,12 +464,16 @@ const CategoryManagement = ({ categories, token, refresh }: { categories: Catego
     const [searchTerm, setSearchTerm] = useState('');
 
     const handleDelete = async (id: number) => {
-        if (!confirm('آیا مطمئن هستید؟ با حذف دسته‌بندی، غذاهای آن نیز حذف نمی‌شوند اما دسته‌بندی آنها نامشخص می‌شود.')) return;
+        if (!confirm('آیا مطمئن هستید؟')) return;
         const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000';
-        await fetch(`${apiUrl}/api/categories/${id}`, {
+        const res = await fetch(`${apiUrl}/api/categories/${id}`, {
             method: 'DELETE',
             headers: { Authorization: `Bearer ${token}` }
         });
+        if (res.status === 409) {
+            alert('این دسته‌بندی هنوز غذا دارد. ابتدا غذاهای آن را حذف یا به دسته‌بندی دیگری منتقل کنید.');
+            return;
+        }
         refresh();
     };
 
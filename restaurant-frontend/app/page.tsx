@@ -27,6 +27,7 @@ interface MenuItem {
   ingredients_en?: string[];
   ingredients_fa?: string[];
   is_available?: boolean;
+  version?: number;
 }
 
 interface Review {
@@ -53,6 +54,33 @@ interface MenuData {
 
 type Lang = 'en' | 'fa';
 
+// Resized WebP/JPEG variants from /api/images; next/image calls the loader
+// once per srcset width. Items that didn't come from the API (the fallback
+// menu) keep their original URL.
+const imageLoader = (item: MenuItem) => {
+  if (item.version === undefined) return undefined;
+  const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000';
+  return ({ width }: { width: number }) => `${apiUrl}/api/images/${item.id}?w=${width}&v=${item.version}`;
+};
+
+// Backend item (MenuItemRead) -> frontend MenuItem
+const toMenuItem = (item: any): MenuItem => ({
+  id: item.id,
+  name_en: item.name,
+  name_fa: item.name_fa,
+  description_en: item.description,
+  description_fa: item.description_fa,
+  price: item.price,
+  image_url: item.image_url,
+  rating: item.rating,
+  calories: item.calories,
+  time: item.time,
+  ingredients_en: item.ingredients_en ? item.ingredients_en.split(',') : [],
+  ingredients_fa: item.ingredients_fa ? item.ingredients_fa.split(',') : [],
+  is_available: item.is_available !== false, // Default to true if missing
+  version: item.version
+});
+
 // ----------------------------------------------------------------------
 // MAIN COMPONENT
 // ----------------------------------------------------------------------
@@ -110,13 +138,29 @@ export default function PaeezRestaurant() {
   useEffect(() => {
     // Track visit
     const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000';
-    fetch(`${apiUrl}/api/track-visit`, { method: 'POST' })
-      .catch(err => console.error('Failed to track visit', err));
+    // Once per browser session, not on every mount
+    if (!sessionStorage.getItem('visitTracked')) {
+      sessionStorage.setItem('visitTracked', '1');
+      fetch(`${apiUrl}/api/track-visit`, { method: 'POST' })
+        .catch(err => console.error('Failed to track visit', err));
+    }
 
     const fetchMenu = async () => {
       try {
         const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000';
-        const res = await fetch(`${apiUrl}/api/menu`);
+        // Prerendered, immutable menu file (CDN-cacheable); the manifest
+        // names the current one. Falls back to the live endpoint.
+        let res: Response | null = null;
+        try {
+          const manifestRes = await fetch(`${apiUrl}/api/menu/manifest`);
+          if (manifestRes.ok) {
+            const manifest = await manifestRes.json();
+            res = await fetch(new URL(manifest.base_url + manifest.files.full, apiUrl));
+          }
+        } catch (err) {
+          console.error('Failed to fetch menu snapshot', err);
+        }
+        if (!res || !res.ok) res = await fetch(`${apiUrl}/api/menu`);
         if (!res.ok) throw new Error('API Error');
         const rawData = await res.json();
 
@@ -125,25 +169,14 @@ export default function PaeezRestaurant() {
           id: cat.id,
           title_en: cat.slug.replace('-', ' ').toUpperCase(), // Fallback
           title_fa: cat.name_fa || cat.name,
-          items: cat.items.map((item: any) => ({
-            id: item.id,
-            name_en: item.name,
-            name_fa: item.name_fa,
-            description_en: item.description,
-            description_fa: item.description_fa,
-            price: item.price,
-            image_url: item.image_url,
-            rating: item.rating,
-            calories: item.calories,
-            time: item.time,
-            ingredients_en: item.ingredients_en ? item.ingredients_en.split(',') : [],
-            ingredients_fa: item.ingredients_fa ? item.ingredients_fa.split(',') : [],
-            is_available: item.is_available !== false // Default to true if missing
-          }))
+          items: cat.items.map(toMenuItem)
         }));
 
         setMenuData({ categories: transformedCategories });
-        if (transformedCategories?.length > 0) setActiveCategory(transformedCategories[0].id);
+        if (transformedCategories?.length > 0) {
+          // Keep the open tab when the menu is reloaded by a live update
+          setActiveCategory(prev => transformedCategories.some((cat: Category) => cat.id === prev) ? prev : transformedCategories[0].id);
+        }
       } catch (err) {
         console.error('Failed to fetch menu:', err);
         setMenuData(FALLBACK_DATA);
@@ -156,6 +189,37 @@ export default function PaeezRestaurant() {
     };
 
     fetchMenu();
+
+    // Live updates (price changes, dishes selling out) patched in place
+    // instead of re-downloading the whole menu
+    if (typeof EventSource === 'undefined') return;
+    const events = new EventSource(`${apiUrl}/api/menu/stream`);
+    events.addEventListener('item_updated', (e) => {
+      const item = JSON.parse((e as MessageEvent).data);
+      setMenuData(prev => prev && {
+        categories: prev.categories.map(cat => {
+          const others = cat.items.filter(i => i.id !== item.id);
+          if (cat.id !== item.category_id) return others.length === cat.items.length ? cat : { ...cat, items: others };
+          const exists = others.length !== cat.items.length;
+          return {
+            ...cat,
+            items: exists ? cat.items.map(i => i.id === item.id ? toMenuItem(item) : i) : [...cat.items, toMenuItem(item)]
+          };
+        })
+      });
+      setSelectedItem(prev => prev && prev.id === item.id ? toMenuItem(item) : prev);
+    });
+    events.addEventListener('item_deleted', (e) => {
+      const { id } = JSON.parse((e as MessageEvent).data);
+      setMenuData(prev => prev && {
+        categories: prev.categories.map(cat => ({ ...cat, items: cat.items.filter(i => i.id !== id) }))
+      });
+    });
+    // Category edits and bulk imports: refetch (served from the cached snapshot)
+    ['category_changed', 'category_deleted', 'menu_reloaded'].forEach(type =>
+      events.addEventListener(type, () => fetchMenu())
+    );
+    return () => events.close();
   }, []);
 
   // Body Scroll Lock
@@ -544,7 +608,7 @@ const MenuItemCard = ({ item, isRTL, t, onClick }: any) => {
   return (
     <div className="group relative cursor-pointer" onClick={onClick}>
       <div className="relative h-[280px] w-full rounded-[45px] overflow-hidden shadow-lg bg-white dark:bg-slate-900">
-        <Image src={item.image_url} alt={isRTL ? item.name_fa : item.name_en} fill className="object-cover group-hover:scale-105 transition-transform duration-700" />
+        <Image src={item.image_url} loader={imageLoader(item)} alt={isRTL ? item.name_fa : item.name_en} fill className="object-cover group-hover:scale-105 transition-transform duration-700" />
         <div className="absolute inset-0 bg-gradient-to-t from-black/60 via-transparent to-transparent opacity-60" />
 
         {/* Availability Badge / Price */}
@@ -611,7 +675,7 @@ const ItemDetailModal = ({ item, onClose, isRTL, t }: any) => {
         <X size={20} />
       </button>
       <div className="relative h-[300px] w-full">
-        <Image src={item.image_url} alt={isRTL ? item.name_fa : item.name_en} fill className="object-cover" />
+        <Image src={item.image_url} loader={imageLoader(item)} alt={isRTL ? item.name_fa : item.name_en} fill className="object-cover" />
         <div className="absolute inset-0 bg-gradient-to-t from-white dark:from-slate-900 via-transparent to-transparent" />
       </div>
       <div className="px-8 pb-8 -mt-12 relative">